@@ -1,88 +1,359 @@
-import pygame, sys
-from pygame.locals import *
-from dataclasses import dataclass
-from collections import namedtuple
+import time
+import random
+
+import pygame
+from pygame.locals import (
+    K_DOWN,
+    K_ESCAPE,
+    K_LEFT,
+    K_RIGHT,
+    K_UP,
+    KEYUP,
+    MOUSEBUTTONUP,
+    MOUSEMOTION,
+    MOUSEWHEEL,
+    QUIT,
+)
+from collections import namedtuple, OrderedDict
 import memory_puzzle_settings as settings
+import memory_puzzle_engine as engine
+from memory_puzzle_engine import Indexes, Tile
+from memory_puzzle_profiler import Profiler
+from memory_puzzle_cli import report, elapsed_ms
 
-from random import shuffle
-
-Indexes = namedtuple("Indexes", ["x", "y"])
 Coords = namedtuple("Coords", ["x", "y"])
 
 
-@dataclass
-class Tile:
-    shape: str
-    color: tuple
-    revealed: bool = False
-
-    def __eq__(self, other):
-        return self.shape == other.shape and self.color == other.color
-
-
 class Core:
     @staticmethod
-    def create_new_board() -> list:
-        tiles = [
-            Tile(shape, color)
-            for shape in settings.ALL_SHAPES
-            for color in settings.ALL_COLORS
-        ]
-        shuffle(tiles)
-        tiles_required = (settings.TILES_ON_WIDTH * settings.TILES_ON_HEIGHT) // 2
-        tiles_required += (settings.TILES_ON_WIDTH * settings.TILES_ON_HEIGHT) % 2
-        
-        tiles = tiles[:tiles_required] * 2
-        shuffle(tiles)
-        #import ipdb; ipdb.set_trace()
-        board = []
-        for y in range(settings.TILES_ON_HEIGHT):
-            row = []
-            for x in range(settings.TILES_ON_WIDTH):
-                row.append(tiles.pop())
-            board.append(row)
-        return board
+    def create_new_board(compact=False, rng=random, config=settings.DEFAULT_CONFIG):
+        width, height = config.tiles_on_width, config.tiles_on_height
+        if compact:
+            return engine.create_compact_board(width, height, rng)
+        return engine.create_board(width, height, rng)
 
     @staticmethod
     def split_into_group(size, tiles):
         return [tiles[i : i + size] for i in range(0, len(tiles), size)]
 
     @staticmethod
-    def get_title_coords_on_display(x_axes, y_axes):
-        x = x_axes * (settings.BOX_SIZE + settings.GAP_SIZE) + settings.X_MARGIN
-        y = y_axes * (settings.BOX_SIZE + settings.GAP_SIZE) + settings.Y_MARGIN
+    def get_title_coords_on_display(x_axes, y_axes, config=settings.DEFAULT_CONFIG):
+        x = x_axes * config.pitch + config.x_margin
+        y = y_axes * config.pitch + config.y_margin
         return x, y
 
 
+class Camera:
+    def __init__(
+        self,
+        view_size,
+        board_width,
+        board_height,
+        zoom=1.0,
+        config=settings.DEFAULT_CONFIG,
+    ):
+        self.view_width, self.view_height = view_size
+        self.board_width = board_width
+        self.board_height = board_height
+        self.x = 0
+        self.y = 0
+        self.zoom = zoom
+        self.config = config
+        self.build_hit_tables()
+
+    @property
+    def box_size(self):
+        return max(2, round(self.config.box_size * self.zoom))
+
+    @property
+    def gap_size(self):
+        return max(1, round(self.config.gap_size * self.zoom))
+
+    @property
+    def pitch(self):
+        return self.box_size + self.gap_size
+
+    def clamp(self):
+        world_width = self.board_width * self.pitch + self.gap_size
+        world_height = self.board_height * self.pitch + self.gap_size
+        self.x = max(0, min(self.x, world_width - self.view_width))
+        self.y = max(0, min(self.y, world_height - self.view_height))
+
+    def scroll(self, dx, dy):
+        self.x += dx
+        self.y += dy
+        self.clamp()
+
+    def zoom_at(self, factor, anchor):
+        # Keeps the board point under `anchor` in place while zooming.
+        config = self.config
+        zoom = max(config.min_zoom, min(self.zoom * factor, config.max_zoom))
+        old_pitch = self.pitch
+        self.zoom = zoom
+        scale = self.pitch / old_pitch
+        self.x = round((self.x + anchor[0]) * scale - anchor[0])
+        self.y = round((self.y + anchor[1]) * scale - anchor[1])
+        self.clamp()
+        if self.pitch != old_pitch:
+            self.build_hit_tables()
+
+    def axis_table(self, tiles):
+        # One entry per board pixel along an axis: the tile index, or None
+        # over a gutter.
+        gutter = (None,) * self.gap_size
+        table = list(gutter)
+        for index in range(tiles):
+            table.extend((index,) * self.box_size)
+            table.extend(gutter)
+        return tuple(table)
+
+    def build_hit_tables(self):
+        # Rebuilt whenever the tile or gap size changes; scrolling only
+        # shifts the lookup.
+        self.hit_columns = self.axis_table(self.board_width)
+        self.hit_rows = self.axis_table(self.board_height)
+
+    def tile_origin(self, x_axes, y_axes):
+        return (
+            x_axes * self.pitch + self.gap_size - self.x,
+            y_axes * self.pitch + self.gap_size - self.y,
+        )
+
+    def visible_range(self):
+        pitch = self.pitch
+        columns = range(
+            max(0, self.x // pitch),
+            min(self.board_width, (self.x + self.view_width) // pitch + 1),
+        )
+        rows = range(
+            max(0, self.y // pitch),
+            min(self.board_height, (self.y + self.view_height) // pitch + 1),
+        )
+        return columns, rows
+
+    def screen_to_tile(self, mouse_x, mouse_y):
+        # Indexes of the tile under a screen pixel, or None off the board
+        # and over gutters.
+        board_x = mouse_x + self.x
+        board_y = mouse_y + self.y
+        columns, rows = self.hit_columns, self.hit_rows
+        if 0 <= board_x < len(columns) and 0 <= board_y < len(rows):
+            x = columns[board_x]
+            y = rows[board_y]
+            if x is not None and y is not None:
+                return Indexes(x, y)
+        return None
+
+
+class DirtyRects:
+    def __init__(self):
+        self.rects = []
+        self.full = False
+
+    def add(self, rect):
+        self.rects.append(pygame.Rect(rect))
+
+    def add_all(self):
+        self.full = True
+
+    def flush(self):
+        # None means the whole display changed.
+        rects, self.rects = self.rects, []
+        full, self.full = self.full, False
+        return None if full else rects
+
+
 class Drawable:
+    sprites = {}
+    # Zoomed copies of the icon sprites, least recently used first. Every
+    # zoom level needs its own, so they are capped by total size.
+    scaled = OrderedDict()
+    scaled_bytes = 0
+    MAX_SCALED_BYTES = 32 * 1024 * 1024
+    dirty = DirtyRects()
+    font = None
+    # Face-down board layers by surface size, tile size and config.
+    backgrounds = {}
+    MAX_BACKGROUNDS = 8
+
     @staticmethod
-    def draw_board(surf, board):
-        for x_axes in range(settings.TILES_ON_WIDTH):
-            for y_axes in range(settings.TILES_ON_HEIGHT):
-                left, top = Core.get_title_coords_on_display(x_axes, y_axes)
-                if board[y_axes][x_axes].revealed:
-                    shape, color = (
-                        board[y_axes][x_axes].shape,
-                        board[y_axes][x_axes].color,
-                    )
-                    Drawable.draw_icon(surf, shape, color, Coords(x_axes, y_axes))
-                else:
-                    pygame.draw.rect(
-                        surf,
-                        settings.BOX_COLOR,
-                        (left, top, settings.BOX_SIZE, settings.BOX_SIZE),
+    def draw_board(
+        surf,
+        board,
+        camera=None,
+        opened=(),
+        show_all=False,
+        config=settings.DEFAULT_CONFIG,
+    ):
+        # `opened` holds face-up tiles that are not matched yet, and
+        # `show_all` draws every tile face up as during the preview.
+        # The face-down board is one cached layer; face-up tiles go on top
+        # of it in a single blits() call.
+        Drawable.dirty.add_all()
+        columns, rows = Drawable.tile_ranges(camera, config)
+        size = config.box_size if camera is None else camera.box_size
+
+        icons = []
+        for x_axes in columns:
+            for y_axes in rows:
+                coords = Coords(x_axes, y_axes)
+                tile = board[y_axes][x_axes]
+                if show_all or tile.revealed or coords in opened:
+                    sprite = Drawable.get_icon_sprite(
+                        tile.shape, tile.color, tile.glyph, size, config
                     )
+                    icons.append((sprite, Drawable.tile_rect(coords, camera, config)))
+        Drawable.draw_background(surf, camera, config)
+        surf.blits(icons, doreturn=False)
+
+    @staticmethod
+    def tile_ranges(camera=None, config=settings.DEFAULT_CONFIG):
+        if camera is None:
+            return range(config.tiles_on_width), range(config.tiles_on_height)
+        return camera.visible_range()
 
     @staticmethod
-    def draw_icon(surf, shape, color, coords):
-        quarter = int(settings.BOX_SIZE * 0.25)
-        half = int(settings.BOX_SIZE * 0.5)
-        left, top = Core.get_title_coords_on_display(coords.x, coords.y)
+    def draw_background(surf, camera=None, config=settings.DEFAULT_CONFIG):
+        # Gutters in the board color and a cover on every tile. The cached
+        # layer holds covers for one pitch more than the surface, so any
+        # scroll position is the layer blitted from its sub-pitch offset,
+        # clipped to the board.
+        if camera is None:
+            x = y = 0
+            box_size, gap_size = config.box_size, config.gap_size
+            board_size = config.resolution
+        else:
+            x, y = camera.x, camera.y
+            box_size, gap_size = camera.box_size, camera.gap_size
+            board_size = (
+                camera.board_width * camera.pitch + gap_size,
+                camera.board_height * camera.pitch + gap_size,
+            )
+        pitch = box_size + gap_size
+        layer = Drawable.get_background(surf.get_size(), box_size, gap_size, config)
+        bounds = surf.get_rect()
+        board = pygame.Rect((-x, -y), board_size).clip(bounds)
+        if board != bounds:
+            surf.fill(config.board_color)
+        area = board.move(x % pitch, y % pitch)
+        surf.blit(layer, board, area)
+
+    @staticmethod
+    def get_background(size, box_size, gap_size, config=settings.DEFAULT_CONFIG):
+        key = (size, box_size, gap_size, config)
+        layer = Drawable.backgrounds.get(key)
+        if layer is not None:
+            return layer
+
+        pitch = box_size + gap_size
+        width, height = size[0] + pitch, size[1] + pitch
+        layer = pygame.Surface((width, height))
+        layer.fill(config.board_color)
+        cover = Drawable.get_cover_sprite(box_size, config)
+        layer.blits(
+            [
+                (cover, (left, top))
+                for left in range(gap_size, width, pitch)
+                for top in range(gap_size, height, pitch)
+            ],
+            doreturn=False,
+        )
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()
+        if len(Drawable.backgrounds) >= Drawable.MAX_BACKGROUNDS:
+            # Drops the oldest layer, usually a zoom level left behind.
+            del Drawable.backgrounds[next(iter(Drawable.backgrounds))]
+        Drawable.backgrounds[key] = layer
+        return layer
+
+    @staticmethod
+    def get_cover_sprite(size=None, config=settings.DEFAULT_CONFIG):
+        size = config.box_size if size is None else size
+        key = ("cover", size, config.box_color)
+        sprite = Drawable.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((size, size))
+            sprite.fill(config.box_color)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert()
+            Drawable.sprites[key] = sprite
+        return sprite
+
+    @staticmethod
+    def tile_rect(coords, camera=None, config=settings.DEFAULT_CONFIG):
+        if camera is None:
+            left, top = Core.get_title_coords_on_display(coords.x, coords.y, config)
+            return pygame.Rect(left, top, config.box_size, config.box_size)
+        left, top = camera.tile_origin(coords.x, coords.y)
+        return pygame.Rect(left, top, camera.box_size, camera.box_size)
+
+    @staticmethod
+    def draw_icon(
+        surf, shape, color, coords, glyph=0, camera=None, config=settings.DEFAULT_CONFIG
+    ):
+        rect = Drawable.tile_rect(coords, camera, config)
+        sprite = Drawable.get_icon_sprite(shape, color, glyph, rect.width, config)
+        Drawable.dirty.add(surf.blit(sprite, rect))
+
+    @staticmethod
+    def get_icon_sprite(
+        shape, color, glyph=0, size=None, config=settings.DEFAULT_CONFIG
+    ):
+        size = config.box_size if size is None else size
+        if size != config.box_size:
+            return Drawable.get_scaled_sprite(shape, color, glyph, size, config)
+        key = (shape, color, glyph, size, config.style)
+        sprite = Drawable.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((config.box_size, config.box_size))
+            sprite.fill(config.board_color)
+            Drawable.rasterise_icon(sprite, shape, color, 0, 0, config)
+            if glyph:
+                Drawable.rasterise_glyph(sprite, glyph, 0, 0, config)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert()
+            Drawable.sprites[key] = sprite
+        return sprite
+
+    @staticmethod
+    def get_scaled_sprite(shape, color, glyph, size, config=settings.DEFAULT_CONFIG):
+        # Zoomed sprites are scaled from the full-size one, so configs with
+        # another box size need their own copies even at the same size.
+        key = (shape, color, glyph, size, config.box_size, config.style)
+        scaled = Drawable.scaled
+        sprite = scaled.get(key)
+        if sprite is not None:
+            scaled.move_to_end(key)
+            return sprite
+        sprite = pygame.transform.scale(
+            Drawable.get_icon_sprite(shape, color, glyph, config=config),
+            (size, size),
+        )
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert()
+        scaled[key] = sprite
+        Drawable.scaled_bytes += sprite.get_pitch() * size
+        while Drawable.scaled_bytes > Drawable.MAX_SCALED_BYTES and len(scaled) > 1:
+            _, dropped = scaled.popitem(last=False)
+            Drawable.scaled_bytes -= dropped.get_pitch() * dropped.get_height()
+        return sprite
+
+    @staticmethod
+    def build_sprites(config=settings.DEFAULT_CONFIG):
+        for shape in settings.ALL_SHAPES:
+            for color in settings.ALL_COLORS:
+                Drawable.get_icon_sprite(shape, color, config=config)
+
+    @staticmethod
+    def rasterise_icon(surf, shape, color, left, top, config=settings.DEFAULT_CONFIG):
+        box_size = config.box_size
+        quarter = int(box_size * 0.25)
+        half = int(box_size * 0.5)
 
         if shape == settings.DONUT:
             pygame.draw.circle(surf, color, (left + half, top + half), half - 5)
             pygame.draw.circle(
-                surf, settings.BG_COLOR, (left + half, top + half), quarter - 5
+                surf, config.bg_color, (left + half, top + half), quarter - 5
             )
 
         elif shape == settings.SQUARE:
@@ -92,8 +363,8 @@ class Drawable:
                 (
                     left + quarter,
                     top + quarter,
-                    settings.BOX_SIZE - half,
-                    settings.BOX_SIZE - half,
+                    box_size - half,
+                    box_size - half,
                 ),
             )
 
@@ -103,48 +374,114 @@ class Drawable:
                 color,
                 (
                     (left + half, top),
-                    (left + settings.BOX_SIZE - 1, top + half),
-                    (left + half, top + settings.BOX_SIZE - 1),
+                    (left + box_size - 1, top + half),
+                    (left + half, top + box_size - 1),
                     (left, top + half),
                 ),
             )
 
-        elif settings.LINES:
-            for i in range(0, settings.BOX_SIZE, 4):
+        elif shape == settings.LINES:
+            for i in range(0, box_size, 4):
                 pygame.draw.line(surf, color, (left, top + i), (left + i, top))
                 pygame.draw.line(
                     surf,
                     color,
-                    (left + i, top + settings.BOX_SIZE - 1),
-                    (left + settings.BOX_SIZE - 1, top + i),
+                    (left + i, top + box_size - 1),
+                    (left + box_size - 1, top + i),
                 )
-        elif settings.OVAL:
+        elif shape == settings.OVAL:
             pygame.draw.ellipse(
-                surf, color, (left, top + quarter, settings.BOX_SIZE, half)
+                surf, color, (left, top + quarter, box_size, half)
+            )
+
+        elif shape == settings.TRIANGLE:
+            pygame.draw.polygon(
+                surf,
+                color,
+                (
+                    (left + half, top + quarter // 2),
+                    (left + box_size - 1, top + box_size - 1),
+                    (left, top + box_size - 1),
+                ),
+            )
+
+        elif shape == settings.CROSS:
+            pygame.draw.rect(
+                surf, color, (left + half - 4, top + 2, 8, box_size - 4)
+            )
+            pygame.draw.rect(
+                surf, color, (left + 2, top + half - 4, box_size - 4, 8)
             )
 
     @staticmethod
-    def draw_open_tiles(surf, tile, indexes):
-        left, top = Core.get_title_coords_on_display(indexes.x, indexes.y)
-        pygame.draw.rect(
-            surf,
-            settings.BOARD_COLOR,
-            (left, top, settings.BOX_SIZE, settings.BOX_SIZE),
-        )
+    def rasterise_glyph(surf, glyph, left, top, config=settings.DEFAULT_CONFIG):
+        # Glyph bits become dots on a 3x3 grid in the top-left corner.
+        dot = max(3, config.box_size // 10)
+        for bit in range(settings.GLYPH_BITS):
+            if glyph & (1 << bit):
+                row, column = divmod(bit, 3)
+                pygame.draw.rect(
+                    surf,
+                    config.glyph_color,
+                    (left + 1 + column * dot, top + 1 + row * dot, dot - 1, dot - 1),
+                )
+
+    @staticmethod
+    def draw_open_tiles(
+        surf, tile, indexes, camera=None, config=settings.DEFAULT_CONFIG
+    ):
         shape, color = tile.shape, tile.color
-        Drawable.draw_icon(surf, shape, color, indexes)
+        Drawable.draw_icon(surf, shape, color, indexes, tile.glyph, camera, config)
 
     @staticmethod
-    def draw_closed_tiles(surf, tile, indexes):
-        left, top = Core.get_title_coords_on_display(indexes.x, indexes.y)
-        pygame.draw.rect(
-            surf,
-            settings.BOX_COLOR,
-            (left, top, settings.BOX_SIZE, settings.BOX_SIZE),
+    def draw_closed_tiles(
+        surf, tile, indexes, camera=None, config=settings.DEFAULT_CONFIG
+    ):
+        rect = Drawable.tile_rect(indexes, camera, config)
+        cover = Drawable.get_cover_sprite(rect.width, config)
+        Drawable.dirty.add(surf.blit(cover, rect))
+
+    @staticmethod
+    def draw_highlight(
+        surf, indexes, color, camera=None, config=settings.DEFAULT_CONFIG
+    ):
+        # A frame drawn in the gutter around a tile, like the original game's
+        # drawHighlightBox. Drawing it in the board color erases it.
+        gap = camera.gap_size if camera is not None else config.gap_size
+        if gap < 2:
+            # A 1 px gutter leaves no room for a frame outside the tile, and
+            # erasing one drawn on the tile would paint over its cover.
+            return
+        rect = Drawable.tile_rect(indexes, camera, config)
+        inset = gap // 2
+        width = max(1, inset * 4 // 5)
+        Drawable.dirty.add(
+            pygame.draw.rect(surf, color, rect.inflate(inset * 2, inset * 2), width)
         )
 
+    @staticmethod
+    def draw_overlay(surf, text, config=settings.DEFAULT_CONFIG):
+        if Drawable.font is None:
+            # The font module is only initialised once an overlay is drawn.
+            pygame.font.init()
+            Drawable.font = pygame.font.Font(None, config.overlay_font_size)
+        label = Drawable.font.render(text, True, config.overlay_color, config.bg_color)
+        Drawable.dirty.add(surf.blit(label, (0, 0)))
+
+    @staticmethod
+    def update_display():
+        # Returns the rects that were updated, None meaning all of them.
+        rects = Drawable.dirty.flush()
+        if rects is None:
+            pygame.display.update()
+        elif rects:
+            pygame.display.update(rects)
+        return rects
+
     @staticmethod
     def board_revealed(board):
+        if isinstance(board, engine.CompactBoard):
+            return board.all_revealed()
         for row in board:
             for tile in row:
                 if not tile.revealed:
@@ -153,99 +490,239 @@ class Drawable:
 
 class Animation:
     @staticmethod
-    def start_game(surf, board):
-        Animation.reveal_tiles(surf, board, tiles=None)
-        pygame.display.update()
-        pygame.time.wait(10000)
-        Animation.hide_tiles(surf, board, tiles=None)
-
+    def start_game(surf, board, camera=None, config=settings.DEFAULT_CONFIG):
+        Animation.reveal_tiles(surf, board, tiles=None, camera=camera, config=config)
+        Drawable.update_display()
+
+    # With tiles=None the whole board is repainted at once. Given a list of
+    # tiles, reveal_tiles and hide_tiles return an animation instead: a
+    # generator that draws one frame of a sliding cover over just those
+    # tiles each time it is advanced, so the event loop keeps running.
     @staticmethod
-    def reveal_tiles(surf, board, tiles=None):
+    def reveal_tiles(
+        surf, board, tiles=None, camera=None, config=settings.DEFAULT_CONFIG
+    ):
         if tiles is None:
-            for y, row in enumerate(board):
-                for x, tile in enumerate(row):
-                    Drawable.draw_open_tiles(surf, tile, Indexes(x, y))
-        else:
-            pass
+            Drawable.draw_board(surf, board, camera, show_all=True, config=config)
+            return None
+        speed = config.reveal_speed
+        coverages = range(config.box_size, -speed - 1, -speed)
+        return Animation.slide_cover(surf, board, tiles, coverages, camera, config)
 
     @staticmethod
-    def hide_tiles(surf, board, tiles=None):
+    def hide_tiles(
+        surf, board, tiles=None, camera=None, config=settings.DEFAULT_CONFIG
+    ):
         if tiles is None:
-            for y, row in enumerate(board):
-                for x, tile in enumerate(row):
-                    Drawable.draw_closed_tiles(surf, tile, Indexes(x, y))
-        else:
-            pass
-
+            Drawable.draw_board(surf, board, camera, config=config)
+            return None
+        speed = config.reveal_speed
+        coverages = range(0, config.box_size + speed, speed)
+        return Animation.slide_cover(surf, board, tiles, coverages, camera, config)
 
-class Main:
     @staticmethod
-    def run():
-        pygame.init()
-        pygame.display.set_caption(settings.TITLE)
-
-        window = pygame.display.set_mode(settings.RESOLUTION)
-        window.fill(settings.BOARD_COLOR)
-
-        clock = pygame.time.Clock()
+    def slide_cover(surf, board, tiles, coverages, camera, config):
+        # Coverages are in unzoomed pixels; the camera is read every frame
+        # so scrolling or zooming mid-animation keeps tiles in place.
+        tiles = list(tiles)
+        for coverage in coverages:
+            for indexes in tiles:
+                tile = board[indexes.y][indexes.x]
+                Drawable.draw_icon(
+                    surf, tile.shape, tile.color, indexes, tile.glyph, camera, config
+                )
+                if coverage > 0:
+                    rect = Drawable.tile_rect(indexes, camera, config)
+                    width = min(rect.width, coverage * rect.width // config.box_size)
+                    cover = Drawable.get_cover_sprite(rect.width, config)
+                    surf.blit(cover, rect, (0, 0, width, rect.height))
+            yield coverage
 
+    @staticmethod
+    def advance(animations):
+        # Draws the next frame of every animation and keeps the running ones.
+        return [
+            animation for animation in animations if next(animation, None) is not None
+        ]
 
-        board = Core.create_new_board()
-        Drawable.draw_board(window, board)
 
-        first_tile = None
+class Main:
+    @staticmethod
+    def run(
+        seed=None,
+        record=None,
+        profile=False,
+        trace=None,
+        config=settings.DEFAULT_CONFIG,
+        timing=False,
+        video=None,
+        video_encoding="zlib",
+        results=None,
+    ):
+        # Only the display is initialised: the game has no use for audio,
+        # joysticks or the other subsystems pygame.init() would start.
+        init_start = time.perf_counter()
+        pygame.display.init()
+        pygame.display.set_caption(config.title)
+
+        window = pygame.display.set_mode(config.window_size)
+        window.fill(config.board_color)
+        Drawable.build_sprites(config)
+        if timing:
+            report("display init", elapsed_ms(init_start))
 
-        Animation.start_game(window, board)
+        clock = pygame.time.Clock()
+        profiler = Profiler(
+            enabled=profile or trace is not None, keep_trace=trace is not None
+        )
+        # The recorder, the results store and the replay log are only
+        # imported when an option asks for them.
+        recorder = None
+        if video is not None:
+            from memory_puzzle_recorder import Recorder
+
+            recorder = Recorder(video, window.get_size(), config.fps, video_encoding)
+        store = None
+        if results is not None:
+            from memory_puzzle_results import ResultsStore, game_result
+
+            store = ResultsStore(results)
+
+        seed = engine.new_seed() if seed is None else seed
+        replay = None
+        if record is not None or store is not None:
+            from memory_puzzle_replay import ReplayLog
+
+            replay = ReplayLog(seed, config.tiles_on_width, config.tiles_on_height)
+        board = Core.create_new_board(rng=random.Random(seed), config=config)
+        game = engine.Engine(board)
+        turn = engine.Turn(game, config.preview_time, config.mismatch_time)
+        camera = Camera(config.window_size, game.width, game.height, config=config)
+        # pygame's own ticks stay at 0 until the timer subsystem starts on
+        # the first Clock.tick, so timestamps come from perf_counter.
+        # Recordings count from the first frame, clicks from the end of the
+        # preview.
+        started = play_started = time.perf_counter()
+
+        Animation.start_game(window, board, camera, config)
+        if timing:
+            report("first frame", elapsed_ms(init_start))
 
         mouse_x, mouse_y = 0, 0
         mouse_clicked = False
+        hovered = highlighted = None
+        animations = []
+        dt = 0
         run = True
         while run:
-            for event in pygame.event.get():
-                if event.type == QUIT or (
-                    event.type == KEYUP and event.key == K_ESCAPE
-                ):
-                    run = False
-                elif event.type == MOUSEBUTTONUP:
-                    mouse_x, mouse_y = event.pos
-                    mouse_clicked = True
-            if Core.board_revealed(board):
-                pass
-
-            if mouse_clicked:
-                indexes = Indexes(
-                    (mouse_x - settings.GAP_SIZE) // (settings.BOX_SIZE + settings.GAP_SIZE),
-                    (mouse_y - settings.GAP_SIZE) // (settings.BOX_SIZE + settings.GAP_SIZE),
-                )
-                if indexes.x not in range(settings.TILES_ON_WIDTH) or indexes.y not in range(settings.TILES_ON_HEIGHT):
-                    mouse_clicked = False
-                    continue
-
-                if first_tile is None:
-                    first_tile = indexes
-                    Drawable.draw_open_tiles(
-                        window, board[indexes.y][indexes.x], indexes
+            moved = False
+            with profiler.span("events"):
+                for event in pygame.event.get():
+                    if event.type == QUIT or (
+                        event.type == KEYUP and event.key == K_ESCAPE
+                    ):
+                        run = False
+                    elif event.type == MOUSEBUTTONUP and event.button in (1, 2, 3):
+                        mouse_x, mouse_y = event.pos
+                        mouse_clicked = True
+                    elif event.type == MOUSEMOTION:
+                        hovered = camera.screen_to_tile(*event.pos)
+                    elif event.type == MOUSEWHEEL:
+                        factor = config.zoom_step**event.y
+                        camera.zoom_at(factor, pygame.mouse.get_pos())
+                        moved = True
+
+                keys = pygame.key.get_pressed()
+                dx = (keys[K_RIGHT] - keys[K_LEFT]) * config.scroll_speed
+                dy = (keys[K_DOWN] - keys[K_UP]) * config.scroll_speed
+                if dx or dy:
+                    camera.scroll(dx, dy)
+                    moved = True
+                if moved:
+                    hovered = camera.screen_to_tile(*pygame.mouse.get_pos())
+
+            with profiler.span("turn"):
+                indexes = None
+                if mouse_clicked:
+                    indexes = camera.screen_to_tile(mouse_x, mouse_y)
+                if indexes is not None:
+                    selection = turn.click(indexes)
+                    if selection.result != engine.IGNORED:
+                        if replay is not None:
+                            replay.record(round(elapsed_ms(play_started)), indexes)
+                        if store is not None and turn.state == engine.WON:
+                            store.record(game_result(replay, game))
+                        animations.append(
+                            Animation.reveal_tiles(
+                                window, board, [indexes], camera, config
+                            )
+                        )
+
+                ended = turn.update(dt)
+                if ended == engine.PREVIEW:
+                    play_started = time.perf_counter()
+                    if replay is not None:
+                        replay.start = round(elapsed_ms(started))
+                    Animation.hide_tiles(
+                        window, board, tiles=None, camera=camera, config=config
+                    )
+                    # The repaint wiped the highlight; draw it again below.
+                    highlighted = None
+                elif ended == engine.MISMATCH_COOLDOWN:
+                    animations.append(
+                        Animation.hide_tiles(
+                            window, board, turn.pending, camera, config
+                        )
                     )
-                else:
-                    if first_tile == indexes:
-                        mouse_clicked = False
-                        continue
 
-                    Drawable.draw_open_tiles(
-                        window, board[indexes.y][indexes.x], indexes
+            with profiler.span("draw"):
+                if moved:
+                    Drawable.draw_board(
+                        window,
+                        board,
+                        camera,
+                        opened=turn.opened(),
+                        show_all=turn.state == engine.PREVIEW,
+                        config=config,
                     )
-                    pygame.display.update()
-                    pygame.time.wait(2000)
-                    if board[indexes.y][indexes.x] == board[first_tile.y][first_tile.x]:
-                        board[indexes.y][indexes.x].revealed = True
-                        board[first_tile.y][first_tile.x].revealed = True
-                    Drawable.draw_board(window, board)
-                    first_tile = None
-
-            mouse_clicked = False
-            pygame.display.update()
-            clock.tick(settings.FPS)
+                animations = Animation.advance(animations)
+                if hovered is not None and game.tile(hovered).revealed:
+                    hovered = None
+                if hovered != highlighted or moved:
+                    if highlighted is not None and not moved:
+                        Drawable.draw_highlight(
+                            window, highlighted, config.board_color, camera, config
+                        )
+                    if hovered is not None:
+                        Drawable.draw_highlight(
+                            window, hovered, config.highlight_color, camera, config
+                        )
+                    highlighted = hovered
+                if profile:
+                    Drawable.draw_overlay(window, profiler.summary(), config)
+
+            with profiler.span("display"):
+                mouse_clicked = False
+                rects = Drawable.update_display()
+
+            if recorder is not None:
+                with profiler.span("record"):
+                    recorder.capture(window, round(elapsed_ms(started)), rects)
+
+            dt = clock.tick(config.fps)
+            profiler.end_frame(dt)
+
+        if record is not None:
+            replay.save(record)
+        if recorder is not None:
+            recorder.close()
+        if store is not None:
+            store.close()
+        if trace is not None:
+            profiler.dump(trace)
 
 
 if __name__ == "__main__":
-    Main.run()
+    from memory_puzzle_cli import main
+
+    main(play=Main.run)
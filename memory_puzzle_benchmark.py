@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+from itertools import cycle
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+import memory_puzzle_settings as settings
+import memory_puzzle_engine as engine
+from memory_puzzle import Camera, Core, Drawable, Animation, Coords, Tile
+from memory_puzzle_cli import parse_size
+from memory_puzzle_profiler import percentile
+
+SIZES = ((4, 5), (10, 10), (20, 20), (40, 40))
+ROUNDS = 50
+SEED = 1
+ICON_CONFIG = settings.GameConfig(tiles_on_width=1, tiles_on_height=1)
+
+
+def make_board(width, height, revealed=True):
+    identities = cycle(
+        (shape, color)
+        for shape in settings.ALL_SHAPES
+        for color in settings.ALL_COLORS
+    )
+    board = []
+    for y in range(height):
+        row = []
+        for x in range(width):
+            shape, color = next(identities)
+            row.append(Tile(shape, color, revealed))
+        board.append(row)
+    return board
+
+
+def board_surface(config):
+    return pygame.Surface(config.resolution)
+
+
+def summarise(name, size, samples):
+    total = sum(samples)
+    return {
+        "name": name,
+        "size": size,
+        "rounds": len(samples),
+        "ops_per_sec": len(samples) / total if total else float("inf"),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p90_ms": percentile(samples, 90) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def sample(func, rounds):
+    func()
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def redraw_rasterised(surf, board, config):
+    # The pre-atlas draw path: every icon goes through pygame.draw.
+    for y, row in enumerate(board):
+        for x, tile in enumerate(row):
+            left, top = Core.get_title_coords_on_display(x, y, config)
+            Drawable.rasterise_icon(surf, tile.shape, tile.color, left, top, config)
+
+
+def bench_create_board(config, rounds):
+    rng = random.Random(SEED)
+    return sample(lambda: Core.create_new_board(rng=rng, config=config), rounds)
+
+
+def bench_create_compact_board(config, rounds):
+    rng = random.Random(SEED)
+    return sample(
+        lambda: Core.create_new_board(compact=True, rng=rng, config=config), rounds
+    )
+
+
+def bench_draw_board(config, rounds):
+    surf = board_surface(config)
+    board = Core.create_new_board(rng=random.Random(SEED), config=config)
+    for row in board:
+        for tile in row:
+            tile.revealed = True
+    return sample(lambda: Drawable.draw_board(surf, board, config=config), rounds)
+
+
+def scroll_board(config, rounds, zoom):
+    # Redraws a window-sized view while scrolling diagonally, as Main.run
+    # does on every frame an arrow key is held. Every other row is face up.
+    surf = pygame.Surface(config.window_size)
+    board = Core.create_new_board(rng=random.Random(SEED), config=config)
+    for row in board[::2]:
+        for tile in row:
+            tile.revealed = True
+    camera = Camera(
+        config.window_size,
+        config.tiles_on_width,
+        config.tiles_on_height,
+        zoom,
+        config,
+    )
+
+    def scroll():
+        x, y = camera.x, camera.y
+        camera.scroll(config.scroll_speed, config.scroll_speed // 2)
+        if (camera.x, camera.y) == (x, y):
+            camera.x = camera.y = 0
+        Drawable.draw_board(surf, board, camera, config=config)
+
+    return sample(scroll, rounds)
+
+
+def bench_scroll_board(config, rounds):
+    return scroll_board(config, rounds, 1.0)
+
+
+def bench_scroll_board_zoomed_out(config, rounds):
+    return scroll_board(config, rounds, 0.5)
+
+
+def bench_draw_board_rasterised(config, rounds):
+    surf = board_surface(config)
+    board = make_board(config.tiles_on_width, config.tiles_on_height)
+    return sample(lambda: redraw_rasterised(surf, board, config), rounds)
+
+
+def bench_reveal_tiles(config, rounds):
+    surf = board_surface(config)
+    board = Core.create_new_board(rng=random.Random(SEED), config=config)
+    return sample(lambda: Animation.reveal_tiles(surf, board, config=config), rounds)
+
+
+def bench_hide_tiles(config, rounds):
+    surf = board_surface(config)
+    board = Core.create_new_board(rng=random.Random(SEED), config=config)
+    return sample(lambda: Animation.hide_tiles(surf, board, config=config), rounds)
+
+
+def bench_animate_pair(config, rounds):
+    # Runs a full sliding reveal of the first two tiles, frame by frame.
+    surf = board_surface(config)
+    board = Core.create_new_board(rng=random.Random(SEED), config=config)
+    pair = [Coords(0, 0), Coords(1, 0)]
+
+    def animate():
+        animations = [Animation.reveal_tiles(surf, board, pair, config=config)]
+        while animations:
+            animations = Animation.advance(animations)
+        Drawable.dirty.flush()
+
+    return sample(animate, rounds)
+
+
+def bench_full_game(config, rounds):
+    # Plays a scripted game and draws each opened tile, as Main.run would.
+    surf = board_surface(config)
+    rng = random.Random(SEED)
+
+    def play():
+        board = Core.create_new_board(rng=rng, config=config)
+        game = engine.Engine(board)
+        for indexes in engine.pairs_script(board):
+            game.select(indexes)
+            Drawable.draw_open_tiles(
+                surf, game.tile(indexes), indexes, config=config
+            )
+            Drawable.dirty.flush()
+
+    return sample(play, rounds)
+
+
+def bench_draw_icon(shape, rounds):
+    surf = board_surface(ICON_CONFIG)
+    color = settings.ALL_COLORS[0]
+    coords = Coords(0, 0)
+    return sample(lambda: Drawable.draw_icon(surf, shape, color, coords), rounds)
+
+
+def bench_rasterise_icon(shape, rounds):
+    surf = board_surface(ICON_CONFIG)
+    color = settings.ALL_COLORS[0]
+    return sample(lambda: Drawable.rasterise_icon(surf, shape, color, 0, 0), rounds)
+
+
+BOARD_BENCHMARKS = {
+    "create_board": bench_create_board,
+    "create_compact_board": bench_create_compact_board,
+    "draw_board": bench_draw_board,
+    "draw_board_rasterised": bench_draw_board_rasterised,
+    "scroll_board": bench_scroll_board,
+    "scroll_board_zoomed_out": bench_scroll_board_zoomed_out,
+    "reveal_tiles": bench_reveal_tiles,
+    "hide_tiles": bench_hide_tiles,
+    "animate_pair": bench_animate_pair,
+    "full_game": bench_full_game,
+}
+ICON_BENCHMARKS = {
+    "draw_icon": bench_draw_icon,
+    "rasterise_icon": bench_rasterise_icon,
+}
+
+
+def run(sizes=SIZES, rounds=ROUNDS, names=None):
+    results = []
+    for name, bench in BOARD_BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        for width, height in sizes:
+            config = settings.GameConfig(tiles_on_width=width, tiles_on_height=height)
+            samples = bench(config, rounds)
+            results.append(summarise(name, f"{width}x{height}", samples))
+    for name, bench in ICON_BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        for shape in settings.ALL_SHAPES + settings.EXTRA_SHAPES:
+            results.append(summarise(name, shape, bench(shape, rounds * 20)))
+    Drawable.dirty.flush()
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "video_driver": os.environ["SDL_VIDEODRIVER"],
+            "rounds": rounds,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    # Prints the p50 change for every benchmark both reports share.
+    previous = {(r["name"], r["size"]): r for r in baseline["results"]}
+    for result in report["results"]:
+        old = previous.get((result["name"], result["size"]))
+        if old is None:
+            continue
+        change = result["p50_ms"] / old["p50_ms"] - 1 if old["p50_ms"] else 0
+        print(
+            f"{result['name']:24} {result['size']:>9} "
+            f"{old['p50_ms']:9.3f} -> {result['p50_ms']:9.3f} ms ({change:+.1%})",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory puzzle benchmarks")
+    parser.add_argument(
+        "--size", type=parse_size, action="append", help="board size, e.g. 20x20"
+    )
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--only", action="append", help="benchmark name to run")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="JSON report to compare against")
+    args = parser.parse_args()
+
+    pygame.display.init()
+    report = run(args.size or SIZES, args.rounds, args.only)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(report, json.load(baseline))
@@ -0,0 +1,163 @@
+import time
+
+STARTED = time.perf_counter()
+
+import os
+import sys
+import argparse
+
+import memory_puzzle_settings as settings
+
+# Launcher that parses the command line before anything heavy is imported.
+# pygame (and with it memory_puzzle) is only imported for the windowed game;
+# --headless plays through the engine and never touches pygame.
+
+
+def elapsed_ms(since):
+    return (time.perf_counter() - since) * 1000
+
+
+def report(label, ms):
+    print(f"{label}: {ms:.1f} ms", file=sys.stderr)
+
+
+def parse_size(value):
+    width, height = (int(n) for n in value.lower().split("x"))
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError("board size must be positive")
+    if (width * height) % 2:
+        # An odd board leaves one tile without a pair and can't be won.
+        raise argparse.ArgumentTypeError("board needs an even number of tiles")
+    return width, height
+
+
+def parse_seed(value):
+    seed = int(value)
+    if not 0 <= seed < settings.SEED_LIMIT:
+        raise argparse.ArgumentTypeError(
+            f"seed must be in 0..{settings.SEED_LIMIT - 1}"
+        )
+    return seed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=settings.TITLE)
+    parser.add_argument(
+        "--size",
+        type=parse_size,
+        help="board size in tiles, e.g. 10x8 (default: settings module)",
+    )
+    parser.add_argument(
+        "--seed", type=parse_seed, help="board seed to replay a layout"
+    )
+    parser.add_argument("--record", metavar="PATH", help="save a replay log on exit")
+    parser.add_argument(
+        "--profile", action="store_true", help="show frame times on screen"
+    )
+    parser.add_argument(
+        "--trace", metavar="PATH", help="write frame timings to a .csv or .json file"
+    )
+    parser.add_argument(
+        "--video", metavar="PATH", help="stream the game to a recording file"
+    )
+    parser.add_argument(
+        "--video-encoding",
+        choices=("zlib", "raw"),
+        default="zlib",
+        help="pixel encoding of --video (default: zlib)",
+    )
+    parser.add_argument(
+        "--results", metavar="PATH", help="SQLite database to record won games in"
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="play the board (or --replay) without a window and print the result",
+    )
+    parser.add_argument(
+        "--replay", metavar="PATH", help="replay log to simulate with --headless"
+    )
+    parser.add_argument(
+        "--timing", action="store_true", help="print import and init times"
+    )
+    return parser
+
+
+def make_config(size):
+    if size is None:
+        return settings.DEFAULT_CONFIG
+    width, height = size
+    return settings.GameConfig(tiles_on_width=width, tiles_on_height=height)
+
+
+def play_headless(args, config):
+    import memory_puzzle_engine as engine
+    from memory_puzzle_replay import ReplayLog, new_seed, simulate
+
+    if args.replay:
+        replay = ReplayLog.load(args.replay)
+        game = simulate(replay)
+    else:
+        replay = ReplayLog(
+            new_seed() if args.seed is None else args.seed,
+            config.tiles_on_width,
+            config.tiles_on_height,
+        )
+        board = engine.create_board(replay.width, replay.height, replay.rng())
+        game = engine.Engine(board)
+        for indexes in engine.pairs_script(board):
+            if game.select(indexes).result != engine.IGNORED:
+                replay.record(0, indexes)
+    if args.record is not None:
+        replay.save(args.record)
+    if args.results is not None and game.is_won():
+        from memory_puzzle_results import ResultsStore, game_result
+
+        store = ResultsStore(args.results)
+        store.record(game_result(replay, game))
+        store.close()
+    print(
+        f"seed {replay.seed}, {replay.width}x{replay.height}, "
+        f"{game.moves} moves, {game.mismatches} mismatches, won: {game.is_won()}"
+    )
+
+
+def main(argv=None, play=None):
+    # `play` is Main.run when memory_puzzle is already imported.
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.replay and not args.headless:
+        parser.error("--replay needs --headless")
+    config = make_config(args.size)
+    if args.timing:
+        report("startup", elapsed_ms(STARTED))
+
+    if args.headless:
+        play_headless(args, config)
+        if args.timing:
+            report("total", elapsed_ms(STARTED))
+        return
+
+    if play is None:
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        start = time.perf_counter()
+        from memory_puzzle import Main
+
+        play = Main.run
+        if args.timing:
+            report("import memory_puzzle", elapsed_ms(start))
+    play(
+        seed=args.seed,
+        record=args.record,
+        profile=args.profile,
+        trace=args.trace,
+        config=config,
+        timing=args.timing,
+        video=args.video,
+        video_encoding=args.video_encoding,
+        results=args.results,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import os
+import json
+import time
+import random
+import argparse
+import platform
+import tracemalloc
+import importlib.util
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+import memory_puzzle_settings as settings
+import memory_puzzle_engine as engine
+from memory_puzzle import Camera, Core, Drawable
+from memory_puzzle_profiler import percentile
+
+# The procedural variants hard-code a 10x7 board, so every variant plays
+# that size.
+WIDTH, HEIGHT = 10, 7
+ROUNDS = 20
+SEED = 1
+# Frames without a click between two clicks, as while the mouse travels.
+IDLE_FRAMES = 2
+RESOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources")
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class ClassBased:
+    # memory_puzzle.py: engine state, cached sprites and dirty rects, so a
+    # frame only draws the tiles that changed.
+    name = "memory_puzzle"
+
+    def __init__(self):
+        self.config = settings.GameConfig(tiles_on_width=WIDTH, tiles_on_height=HEIGHT)
+        self.size = self.config.resolution
+
+    def create(self, seed):
+        board = Core.create_new_board(rng=random.Random(seed), config=self.config)
+        camera = Camera(self.config.window_size, WIDTH, HEIGHT, config=self.config)
+        return engine.Engine(board), camera
+
+    def identity(self, state, x, y):
+        tile = state[0].board[y][x]
+        return tile.shape, tile.color, tile.glyph
+
+    def pixel(self, x, y):
+        left, top = Core.get_title_coords_on_display(x, y, self.config)
+        return left + self.config.box_size // 2, top + self.config.box_size // 2
+
+    def redraw(self, surf, state):
+        game = state[0]
+        Drawable.draw_board(surf, game.board, show_all=True, config=self.config)
+        Drawable.dirty.flush()
+
+    def frame(self, surf, state, click):
+        game, camera = state
+        if click is not None:
+            indexes = camera.screen_to_tile(*click)
+            if indexes is not None:
+                selection = game.select(indexes)
+                if selection.result != engine.IGNORED:
+                    Drawable.draw_open_tiles(
+                        surf, game.tile(indexes), indexes, config=self.config
+                    )
+                if selection.result == engine.MISMATCH:
+                    for tile in (selection.first, selection.second):
+                        Drawable.draw_closed_tiles(
+                            surf, game.tile(tile), tile, config=self.config
+                        )
+        Drawable.dirty.flush()
+        return game.is_won()
+
+
+class Procedural:
+    # The procedural games redraw the whole window every frame. `names`
+    # maps each role to the module's own function or global name.
+    NAMES = {
+        "surface": "DISPLAYSURF",
+        "bg_color": "BGCOLOR",
+        "board": "getRandomizedBoard",
+        "revealed": "generateRevealedBoxesData",
+        "draw_board": "drawBoard",
+        "box_at": "getBoxAtPixel",
+        "box_origin": "leftTopCoordsOfBox",
+        "shape_color": "getShapeAndColor",
+        "highlight": "drawHighlightBox",
+        "has_won": "hasWon",
+    }
+
+    def __init__(self, name, module, names=None, box_size=40, size=(640, 480)):
+        self.name = name
+        self.module = module
+        self.names = dict(self.NAMES, **(names or {}))
+        self.box_size = box_size
+        self.size = size
+
+    def call(self, role, *args):
+        return getattr(self.module, self.names[role])(*args)
+
+    def is_revealed(self, revealed, x, y):
+        if hasattr(self.module, "isRevealed"):
+            return self.module.isRevealed(revealed, x, y)
+        return revealed[x][y]
+
+    def set_revealed(self, revealed, x, y, value):
+        if hasattr(self.module, "setRevealed"):
+            self.module.setRevealed(revealed, x, y, value)
+        else:
+            revealed[x][y] = value
+
+    def create(self, seed):
+        random.seed(seed)
+        # board, revealed boxes, first selection
+        return [self.call("board"), self.call("revealed", False), None]
+
+    def identity(self, state, x, y):
+        return self.call("shape_color", state[0], x, y)
+
+    def pixel(self, x, y):
+        left, top = self.call("box_origin", x, y)
+        return left + self.box_size // 2, top + self.box_size // 2
+
+    def redraw(self, surf, state):
+        setattr(self.module, self.names["surface"], surf)
+        surf.fill(getattr(self.module, self.names["bg_color"], settings.BG_COLOR))
+        self.call("draw_board", state[0], self.call("revealed", True))
+
+    def frame(self, surf, state, click):
+        # The main loop of the procedural games without the blocking
+        # animations and waits.
+        board, revealed, first = state
+        setattr(self.module, self.names["surface"], surf)
+        surf.fill(getattr(self.module, self.names["bg_color"], settings.BG_COLOR))
+        self.call("draw_board", board, revealed)
+        if click is None:
+            return False
+        x, y = self.call("box_at", *click)
+        if x is None or y is None or self.is_revealed(revealed, x, y):
+            return False
+        self.call("highlight", x, y)
+        self.set_revealed(revealed, x, y, True)
+        if first is None:
+            state[2] = (x, y)
+            return False
+        state[2] = None
+        if self.call("shape_color", board, *first) != self.call(
+            "shape_color", board, x, y
+        ):
+            self.set_revealed(revealed, *first, False)
+            self.set_revealed(revealed, x, y, False)
+            return False
+        return self.call("has_won", revealed)
+
+
+def variants():
+    import memory_puzzle_example
+
+    return [
+        ClassBased(),
+        Procedural("memory_puzzle_example", memory_puzzle_example),
+        Procedural(
+            "resources/memorypuzzle",
+            load_module("memorypuzzle", os.path.join(RESOURCES, "memorypuzzle.py")),
+        ),
+        Procedural(
+            "resources/memorypuzzle_obfuscated",
+            load_module(
+                "memorypuzzle_obfuscated",
+                os.path.join(RESOURCES, "memorypuzzle_obfuscated.py"),
+            ),
+            {
+                "surface": "b",
+                "board": "c",
+                "revealed": "d",
+                "draw_board": "f",
+                "box_at": "m",
+                "box_origin": "aa",
+                "shape_color": "s",
+                "highlight": "n",
+                "has_won": "ii",
+            },
+        ),
+    ]
+
+
+def script(variant, state):
+    # Every pair is found once, after a mismatch against the next pair, so
+    # each game has as many mismatches as it has pairs but one.
+    positions = {}
+    for y in range(HEIGHT):
+        for x in range(WIDTH):
+            positions.setdefault(variant.identity(state, x, y), []).append((x, y))
+    pairs = [same[:2] for same in positions.values() if len(same) >= 2]
+    clicks = []
+    for i, (first, second) in enumerate(pairs):
+        if i + 1 < len(pairs):
+            clicks += [first, pairs[i + 1][0]]
+        clicks += [first, second]
+    return [variant.pixel(x, y) for x, y in clicks]
+
+
+def play(variant, surf, seed, frame_times=None):
+    state = variant.create(seed)
+    won = False
+    for click in script(variant, state):
+        for event in [None] * IDLE_FRAMES + [click]:
+            start = time.perf_counter()
+            won = variant.frame(surf, state, event) or won
+            if frame_times is not None:
+                frame_times.append(time.perf_counter() - start)
+    return won
+
+
+def measure(variant, rounds):
+    surf = pygame.Surface(variant.size)
+    create_times, redraw_times, frame_times = [], [], []
+    won = 0
+    for i in range(rounds):
+        start = time.perf_counter()
+        state = variant.create(SEED + i)
+        create_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        variant.redraw(surf, state)
+        redraw_times.append(time.perf_counter() - start)
+
+        won += play(variant, surf, SEED + i, frame_times)
+
+    # Only Python allocations are traced: pygame surfaces, including the
+    # class-based sprite cache, live outside tracemalloc's view.
+    tracemalloc.start()
+    play(variant, surf, SEED)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "name": variant.name,
+        "games_won": f"{won}/{rounds}",
+        "create_ms": percentile(create_times, 50) * 1000,
+        "redraw_ms": percentile(redraw_times, 50) * 1000,
+        "frame_p50_ms": percentile(frame_times, 50) * 1000,
+        "frame_p99_ms": percentile(frame_times, 99) * 1000,
+        "peak_kb": peak / 1024,
+    }
+
+
+def run(rounds=ROUNDS):
+    results = []
+    for variant in variants():
+        try:
+            results.append(measure(variant, rounds))
+        except Exception as error:
+            # A broken variant is reported, not allowed to stop the others.
+            results.append({"name": variant.name, "error": repr(error)})
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "board": f"{WIDTH}x{HEIGHT}",
+            "rounds": rounds,
+        },
+        "results": results,
+    }
+
+
+def print_table(report):
+    columns = ("create_ms", "redraw_ms", "frame_p50_ms", "frame_p99_ms", "peak_kb")
+    print(f"{'variant':36} {'won':>6} " + " ".join(f"{c:>12}" for c in columns))
+    for result in report["results"]:
+        if "error" in result:
+            print(f"{result['name']:36} failed: {result['error']}")
+            continue
+        print(
+            f"{result['name']:36} {result['games_won']:>6} "
+            + " ".join(f"{result[c]:12.3f}" for c in columns)
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the memory puzzle implementations"
+    )
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="games per variant")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    pygame.display.init()
+    report = run(args.rounds)
+    print_table(report)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
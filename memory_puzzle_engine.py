@@ -0,0 +1,424 @@
+import time
+import random
+import colorsys
+from array import array
+from dataclasses import dataclass
+from collections import namedtuple
+from itertools import islice
+
+import memory_puzzle_settings as settings
+
+Indexes = namedtuple("Indexes", ["x", "y"])
+Selection = namedtuple("Selection", ["result", "first", "second"])
+BatchResult = namedtuple(
+    "BatchResult", ["games", "won", "moves", "mismatches", "seconds"]
+)
+
+IGNORED = "ignored"
+FIRST = "first"
+MATCH = "match"
+MISMATCH = "mismatch"
+
+PREVIEW = "preview"
+AWAITING_FIRST = "awaiting-first"
+AWAITING_SECOND = "awaiting-second"
+MISMATCH_COOLDOWN = "mismatch-cooldown"
+WON = "won"
+
+
+@dataclass
+class Tile:
+    shape: str
+    color: tuple
+    revealed: bool = False
+    glyph: int = 0
+
+    def __eq__(self, other):
+        return (
+            self.shape == other.shape
+            and self.color == other.color
+            and self.glyph == other.glyph
+        )
+
+
+def extra_color(i):
+    # Golden-ratio hue steps keep consecutive colors far apart.
+    hue = (0.1 + i * 0.618034) % 1
+    red, green, blue = colorsys.hsv_to_rgb(hue, 0.55 + 0.45 * (i % 2), 0.9)
+    return int(red * 255), int(green * 255), int(blue * 255)
+
+
+def tile_identities():
+    # Yields distinct (shape, color, glyph) triples, starting with the
+    # original shapes and colors. Extra shapes, colors and glyph overlays
+    # only come into play once those are used up.
+    for shape in settings.ALL_SHAPES:
+        for color in settings.ALL_COLORS:
+            yield shape, color, 0
+
+    shapes = settings.ALL_SHAPES + settings.EXTRA_SHAPES
+    colors = settings.ALL_COLORS + tuple(
+        extra_color(i) for i in range(settings.EXTRA_COLORS)
+    )
+    base_colors = len(settings.ALL_COLORS)
+    for glyph in range(1 << settings.GLYPH_BITS):
+        for shape in shapes:
+            for i, color in enumerate(colors):
+                if glyph == 0 and shape in settings.ALL_SHAPES and i < base_colors:
+                    continue
+                yield shape, color, glyph
+
+
+def new_seed():
+    return random.randrange(settings.SEED_LIMIT)
+
+
+def pick_identities(tiles_required, rng=random):
+    base = len(settings.ALL_SHAPES) * len(settings.ALL_COLORS)
+    pool = list(islice(tile_identities(), max(tiles_required, base)))
+    if len(pool) < tiles_required:
+        raise ValueError(
+            f"board needs {tiles_required} tile identities, "
+            f"only {len(pool)} are available"
+        )
+    rng.shuffle(pool)
+    return pool[:tiles_required]
+
+
+def create_board(width=None, height=None, rng=random) -> list:
+    width = settings.TILES_ON_WIDTH if width is None else width
+    height = settings.TILES_ON_HEIGHT if height is None else height
+
+    tiles_required = (width * height) // 2
+    tiles_required += (width * height) % 2
+
+    # Each pair needs two distinct objects, otherwise revealing one
+    # tile would reveal its twin as well.
+    identities = pick_identities(tiles_required, rng)
+    tiles = [
+        Tile(shape, color, False, glyph)
+        for shape, color, glyph in identities * 2
+    ]
+    rng.shuffle(tiles)
+
+    board = []
+    for y in range(height):
+        row = []
+        for x in range(width):
+            row.append(tiles.pop())
+        board.append(row)
+    return board
+
+
+class TileView:
+    # Tile-like access to one cell of a CompactBoard.
+    __slots__ = ("board", "index")
+
+    def __init__(self, board, index):
+        self.board = board
+        self.index = index
+
+    @property
+    def shape(self):
+        return self.board.identities[self.board.ids[self.index]][0]
+
+    @property
+    def color(self):
+        return self.board.identities[self.board.ids[self.index]][1]
+
+    @property
+    def glyph(self):
+        return self.board.identities[self.board.ids[self.index]][2]
+
+    @property
+    def revealed(self):
+        return self.board.is_revealed(self.index)
+
+    @revealed.setter
+    def revealed(self, value):
+        self.board.set_revealed(self.index, value)
+
+    def __eq__(self, other):
+        if isinstance(other, TileView):
+            return self.board.ids[self.index] == other.board.ids[other.index]
+        return (
+            self.shape == other.shape
+            and self.color == other.color
+            and self.glyph == other.glyph
+        )
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"TileView({self.shape!r}, {self.color!r}, {self.revealed!r})"
+
+
+class CompactRow:
+    __slots__ = ("board", "start")
+
+    def __init__(self, board, y):
+        self.board = board
+        self.start = y * board.width
+
+    def __len__(self):
+        return self.board.width
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.board.width:
+            raise IndexError(x)
+        return TileView(self.board, self.start + x)
+
+    def __iter__(self):
+        for index in range(self.start, self.start + self.board.width):
+            yield TileView(self.board, index)
+
+
+class CompactBoard:
+    # Tile identities are small ints indexing into `identities`, and the
+    # revealed flags are packed eight to a byte. board[y][x] hands out
+    # TileView objects so code written for list boards keeps working.
+    def __init__(self, width, height, ids, identities, revealed=None):
+        self.width = width
+        self.height = height
+        self.ids = ids
+        self.identities = identities
+        if revealed is None:
+            revealed = bytearray((width * height + 7) // 8)
+        self.revealed = revealed
+        self.revealed_count = int.from_bytes(revealed, "little").bit_count()
+
+    def index(self, indexes):
+        return indexes.y * self.width + indexes.x
+
+    def is_revealed(self, index):
+        return bool(self.revealed[index >> 3] & (1 << (index & 7)))
+
+    def set_revealed(self, index, value):
+        if self.is_revealed(index) == bool(value):
+            return
+        if value:
+            self.revealed[index >> 3] |= 1 << (index & 7)
+            self.revealed_count += 1
+        else:
+            self.revealed[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+            self.revealed_count -= 1
+
+    def all_revealed(self):
+        return self.revealed_count == self.width * self.height
+
+    def same(self, first, second):
+        return self.ids[first] == self.ids[second]
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.height:
+            raise IndexError(y)
+        return CompactRow(self, y)
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield CompactRow(self, y)
+
+
+def create_compact_board(width=None, height=None, rng=random):
+    width = settings.TILES_ON_WIDTH if width is None else width
+    height = settings.TILES_ON_HEIGHT if height is None else height
+
+    tiles_required = (width * height) // 2
+    tiles_required += (width * height) % 2
+
+    identities = pick_identities(tiles_required, rng)
+    ids = array("H", range(tiles_required)) * 2
+    rng.shuffle(ids)
+    # create_board pops tiles off the end, so a seeded rng gives the same
+    # layout in both representations.
+    ids.reverse()
+    del ids[width * height :]
+    return CompactBoard(width, height, ids, identities)
+
+
+class Engine:
+    def __init__(self, board, on_won=None):
+        self.board = board
+        self.width = len(board[0]) if board else 0
+        self.height = len(board)
+        self.first_tile = None
+        self.moves = 0
+        self.mismatches = 0
+        self.on_won = on_won
+        self.compact = isinstance(board, CompactBoard)
+        # Counted once here, then kept up to date as pairs are matched.
+        if self.compact:
+            self.revealed_count = board.revealed_count
+        else:
+            self.revealed_count = sum(
+                tile.revealed for row in board for tile in row
+            )
+
+    def tile(self, indexes):
+        return self.board[indexes.y][indexes.x]
+
+    def select(self, indexes):
+        if not (0 <= indexes.x < self.width and 0 <= indexes.y < self.height):
+            return Selection(IGNORED, self.first_tile, None)
+        if self.compact:
+            return self.select_compact(indexes)
+        if self.tile(indexes).revealed:
+            return Selection(IGNORED, self.first_tile, None)
+
+        if self.first_tile is None:
+            self.first_tile = indexes
+            return Selection(FIRST, indexes, None)
+        if self.first_tile == indexes:
+            return Selection(IGNORED, self.first_tile, None)
+
+        first, self.first_tile = self.first_tile, None
+        self.moves += 1
+        first_tile, second_tile = self.tile(first), self.tile(indexes)
+        if first_tile == second_tile:
+            first_tile.revealed = True
+            second_tile.revealed = True
+            self.revealed_count += 2
+            if self.on_won is not None and self.is_won():
+                self.on_won(self)
+            return Selection(MATCH, first, indexes)
+        self.mismatches += 1
+        return Selection(MISMATCH, first, indexes)
+
+    def select_compact(self, indexes):
+        # select() on the packed arrays of a CompactBoard: the flag test and
+        # the match check are integer operations, with no rows or tile
+        # views built per click.
+        board = self.board
+        revealed = board.revealed
+        index = board.index(indexes)
+        if revealed[index >> 3] & (1 << (index & 7)):
+            return Selection(IGNORED, self.first_tile, None)
+
+        if self.first_tile is None:
+            self.first_tile = indexes
+            return Selection(FIRST, indexes, None)
+        if self.first_tile == indexes:
+            return Selection(IGNORED, self.first_tile, None)
+
+        first, self.first_tile = self.first_tile, None
+        self.moves += 1
+        first_index = board.index(first)
+        if board.same(first_index, index):
+            # Neither tile is revealed yet, so the bits can be set directly.
+            revealed[first_index >> 3] |= 1 << (first_index & 7)
+            revealed[index >> 3] |= 1 << (index & 7)
+            board.revealed_count += 2
+            self.revealed_count += 2
+            if self.on_won is not None and self.is_won():
+                self.on_won(self)
+            return Selection(MATCH, first, indexes)
+        self.mismatches += 1
+        return Selection(MISMATCH, first, indexes)
+
+    def is_won(self):
+        return self.revealed_count == self.width * self.height
+
+
+class Turn:
+    # Drives an Engine through the timed phases of a game. Time only moves
+    # forward through update(), so the caller keeps control of the loop.
+    def __init__(
+        self,
+        game,
+        preview_time=settings.PREVIEW_TIME,
+        cooldown_time=settings.MISMATCH_TIME,
+    ):
+        self.game = game
+        self.cooldown_time = cooldown_time
+        self.state = PREVIEW
+        self.timer = preview_time
+        self.pending = ()
+
+    def click(self, indexes):
+        if self.state not in (AWAITING_FIRST, AWAITING_SECOND):
+            return Selection(IGNORED, self.game.first_tile, None)
+
+        selection = self.game.select(indexes)
+        if selection.result == FIRST:
+            self.state = AWAITING_SECOND
+        elif selection.result == MATCH:
+            self.state = WON if self.game.is_won() else AWAITING_FIRST
+        elif selection.result == MISMATCH:
+            self.state = MISMATCH_COOLDOWN
+            self.timer = self.cooldown_time
+            self.pending = (selection.first, selection.second)
+        return selection
+
+    def opened(self):
+        # Tiles that are face up without being matched yet.
+        if self.state == MISMATCH_COOLDOWN:
+            return self.pending
+        if self.game.first_tile is not None:
+            return (self.game.first_tile,)
+        return ()
+
+    def update(self, dt):
+        # Returns the phase that has just run out, if any.
+        if self.state not in (PREVIEW, MISMATCH_COOLDOWN):
+            return None
+        self.timer -= dt
+        if self.timer > 0:
+            return None
+
+        ended, self.state, self.timer = self.state, AWAITING_FIRST, 0
+        return ended
+
+
+def pairs_script(board):
+    # Clicks every pair in board order: one move per pair, no mismatches.
+    positions = {}
+    if isinstance(board, CompactBoard):
+        for index, tile_id in enumerate(board.ids):
+            y, x = divmod(index, board.width)
+            positions.setdefault(tile_id, []).append(Indexes(x, y))
+    else:
+        for y, row in enumerate(board):
+            for x, tile in enumerate(row):
+                key = (tile.shape, tile.color, tile.glyph)
+                positions.setdefault(key, []).append(Indexes(x, y))
+    clicks = []
+    for same in positions.values():
+        for i in range(0, len(same) - 1, 2):
+            clicks.append(same[i])
+            clicks.append(same[i + 1])
+    return clicks
+
+
+def play_scripted(board, clicks):
+    engine = Engine(board)
+    for indexes in clicks:
+        engine.select(indexes)
+    return engine
+
+
+def run_batch(
+    games, width=None, height=None, script=pairs_script, compact=False
+):
+    factory = create_compact_board if compact else create_board
+    won = moves = mismatches = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        board = factory(width, height)
+        engine = play_scripted(board, script(board))
+        won += engine.is_won()
+        moves += engine.moves
+        mismatches += engine.mismatches
+    return BatchResult(
+        games, won, moves, mismatches, time.perf_counter() - start
+    )
+
+
+if __name__ == "__main__":
+    result = run_batch(10000)
+    print(
+        f"{result.games} games, {result.won} won, "
+        f"{result.games / result.seconds:.0f} games/sec"
+    )
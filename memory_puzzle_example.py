@@ -10,6 +10,12 @@ GAPSIZE = 10
 BOARDWIDTH = 10
 BOARDHEIGHT = 7
 assert (BOARDWIDTH * BOARDHEIGHT) % 2 == 0, "No"
+BOXCOUNT = BOARDWIDTH * BOARDHEIGHT
+ALLBOXES = (1 << BOXCOUNT) - 1
+# The set bit positions of every byte value, lowest first.
+BYTEBITS = tuple(
+    tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)
+)
 
 XMARGIN = int((WINDOWWIDTH - (BOARDWIDTH * (BOXSIZE + GAPSIZE))) / 2)
 YMARGIN = int((WINDOWHEIGHT - (BOARDHEIGHT * (BOXSIZE + GAPSIZE))) / 2)
@@ -77,11 +83,11 @@ def main():
 
                 boxx, boxy = getBoxAtPixel(mousex, mousey)
                 if boxx != None and boxy != None:
-                    if not revealedBoxes[boxx][boxy]:
+                    if not isRevealed(revealedBoxes, boxx, boxy):
                         drawHighlightBox(boxx, boxy)
-                        if not revealedBoxes[boxx][boxy] and mouseClicked:
+                        if mouseClicked:
                             revealBoxesAnimation(mainBoard, [(boxx, boxy)])
-                            revealedBoxes[boxx][boxy] = True  # set the box as
+                            setRevealed(revealedBoxes, boxx, boxy, True)
 
                             if firstSelection == None:
                                 firstSelection = (boxx, boxy)
@@ -102,10 +108,13 @@ def main():
                                             (boxx, boxy),
                                         ],
                                     )
-                                    revealedBoxes[firstSelection[0]][
-                                        firstSelection[1]
-                                    ] = False
-                                    revealedBoxes[boxx][boxy] = False
+                                    setRevealed(
+                                        revealedBoxes,
+                                        firstSelection[0],
+                                        firstSelection[1],
+                                        False,
+                                    )
+                                    setRevealed(revealedBoxes, boxx, boxy, False)
                                 elif hasWon(revealedBoxes):
                                     gameWonAnimation(mainBoard)
                                     pygame.time.wait(2000)
@@ -124,10 +133,43 @@ def main():
 
 
 def generateRevealedBoxesData(val):
-    revealedBoxes = []
-    for i in range(BOARDWIDTH):
-        revealedBoxes.append([val] * BOARDHEIGHT)
-    return revealedBoxes
+    # One bit per box, at boxy * BOARDWIDTH + boxx, set when it is revealed.
+    bits = ALLBOXES if val else 0
+    return bytearray(bits.to_bytes((BOXCOUNT + 7) // 8, "little"))
+
+
+def isRevealed(revealedBoxes, boxx, boxy):
+    i = boxy * BOARDWIDTH + boxx
+    return revealedBoxes[i >> 3] >> (i & 7) & 1 == 1
+
+
+def setRevealed(revealedBoxes, boxx, boxy, val):
+    i = boxy * BOARDWIDTH + boxx
+    if val:
+        revealedBoxes[i >> 3] |= 1 << (i & 7)
+    else:
+        revealedBoxes[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+
+def countRevealed(revealedBoxes):
+    return int.from_bytes(revealedBoxes, "little").bit_count()
+
+
+def iterBoxes(revealedBoxes, val):
+    # Yields (boxx, boxy) for every revealed box, or every covered one when
+    # val is False. Bytes are read one at a time: a byte with none of the
+    # wanted bits is skipped, and the others are looked up in BYTEBITS.
+    flip = 0 if val else 0xFF
+    for byteIndex, byte in enumerate(revealedBoxes):
+        byte ^= flip
+        if not byte:
+            continue
+        base = byteIndex << 3
+        for bit in BYTEBITS[byte]:
+            i = base + bit
+            if i >= BOXCOUNT:
+                return  # padding bits of the last byte
+            yield i % BOARDWIDTH, i // BOARDWIDTH
 
 
 def getRandomizedBoard():
@@ -147,8 +189,8 @@ def getRandomizedBoard():
         for y in range(BOARDHEIGHT):
             column.append(icons[0])
             del icons[0]  # remove the icons as we assign them
-            board.append(column)
-        return board
+        board.append(column)
+    return board
 
 
 def splitIntoGroupsOf(groupSize, theList):
@@ -169,8 +211,8 @@ def getBoxAtPixel(x, y):
         for boxy in range(BOARDHEIGHT):
             left, top = leftTopCoordsOfBox(boxx, boxy)
             boxRect = pygame.Rect(left, top, BOXSIZE, BOXSIZE)
-    if boxRect.collidepoint(x, y):
-        return (boxx, boxy)
+            if boxRect.collidepoint(x, y):
+                return (boxx, boxy)
     return (None, None)
 
 
@@ -240,15 +282,12 @@ def coverBoxesAnimation(board, boxesToCover):
 
 
 def drawBoard(board, revealed):
-    for boxx in range(BOARDWIDTH):
-        for boxy in range(BOARDHEIGHT):
-            left, top = leftTopCoordsOfBox(boxx, boxy)
-
-            if not revealed[boxx][boxy]:
-                pygame.draw.rect(DISPLAYSURF, BOXCOLOR, (left, top, BOXSIZE, BOXSIZE))
-            else:
-                shape, color = getShapeAndColor(board, boxx, boxy)
-                drawIcon(shape, color, boxx, boxy)
+    for boxx, boxy in iterBoxes(revealed, False):
+        left, top = leftTopCoordsOfBox(boxx, boxy)
+        pygame.draw.rect(DISPLAYSURF, BOXCOLOR, (left, top, BOXSIZE, BOXSIZE))
+    for boxx, boxy in iterBoxes(revealed, True):
+        shape, color = getShapeAndColor(board, boxx, boxy)
+        drawIcon(shape, color, boxx, boxy)
 
 
 def drawHighlightBox(boxx, boxy):
@@ -287,10 +326,7 @@ def gameWonAnimation(board):
 
 
 def hasWon(revealedBoxes):
-    for i in revealedBoxes:
-        if False in i:
-            return False  # return False if any boxes are covered.
-    return True
+    return countRevealed(revealedBoxes) == BOXCOUNT
 
 
 if __name__ == "__main__":
@@ -0,0 +1,134 @@
+import time
+import asyncio
+import argparse
+
+from memory_puzzle_server import HOST, PORT, raise_file_limit
+from memory_puzzle_profiler import percentile
+
+
+class Stats:
+    def __init__(self):
+        self.connected = 0
+        self.peak = 0
+        self.games = 0
+        self.clicks = 0
+        self.errors = 0
+        self.latencies = []
+
+
+async def play_session(host, port, games, stats, hold):
+    # Plays with perfect memory over the wire: every opened tile is
+    # remembered until its pair is found.
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats.errors += 1
+        return
+    stats.connected += 1
+    stats.peak = max(stats.peak, stats.connected)
+
+    async def expect(*kinds):
+        while True:
+            fields = (await reader.readline()).decode().split()
+            if not fields:
+                raise ConnectionError("server closed the connection")
+            if fields[0] in kinds:
+                return fields
+            if fields[0] == "ERROR":
+                raise RuntimeError(" ".join(fields))
+
+    async def click(x, y):
+        start = time.perf_counter()
+        writer.write(f"CLICK {x} {y}\n".encode())
+        fields = await expect("OPEN", "IGNORED")
+        stats.latencies.append(time.perf_counter() - start)
+        stats.clicks += 1
+        if fields[0] == "IGNORED":
+            raise RuntimeError(f"click on {x} {y} was ignored")
+        return tuple(fields[3:])
+
+    try:
+        _, width, height, _ = await expect("HELLO")
+        width, height = int(width), int(height)
+        # Wait for every session to connect before any starts playing.
+        await hold.wait()
+        for game in range(games):
+            if game:
+                writer.write(b"NEW\n")
+                await expect("HELLO")
+            unknown = [(x, y) for y in range(height) for x in range(width)]
+            seen = {}
+            while unknown or seen:
+                pair = next((p for p in seen.values() if len(p) == 2), None)
+                if pair is not None:
+                    first, second = pair
+                else:
+                    first = unknown.pop()
+                identity = await click(*first)
+                if pair is None:
+                    known = seen.get(identity)
+                    if known:
+                        second = known[0]
+                    elif unknown:
+                        second = unknown.pop()
+                    else:
+                        break
+                second_identity = await click(*second)
+
+                result = (await expect("MATCH", "MISMATCH"))[0]
+                if result == "MATCH":
+                    seen.pop(identity, None)
+                else:
+                    for tile, key in ((first, identity), (second, second_identity)):
+                        if tile not in seen.get(key, ()):
+                            seen.setdefault(key, []).append(tile)
+                    await expect("HIDE")
+            stats.games += 1
+        writer.write(b"QUIT\n")
+        await expect("BYE")
+    except (ConnectionError, RuntimeError):
+        stats.errors += 1
+    finally:
+        stats.connected -= 1
+        writer.close()
+
+
+async def main(args):
+    raise_file_limit()
+    stats = Stats()
+    hold = asyncio.Event()
+    sessions = []
+    for _ in range(args.sessions):
+        sessions.append(
+            asyncio.ensure_future(
+                play_session(args.host, args.port, args.games, stats, hold)
+            )
+        )
+        # Open connections in batches so the server's accept backlog keeps up.
+        if len(sessions) % 500 == 0:
+            await asyncio.sleep(0.05)
+    while stats.connected + stats.errors < args.sessions:
+        await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    hold.set()
+    await asyncio.gather(*sessions)
+    elapsed = time.perf_counter() - start
+
+    latencies = stats.latencies or [0.0]
+    print(f"sessions: {args.sessions} (peak concurrent {stats.peak})")
+    print(f"games: {stats.games}, errors: {stats.errors}")
+    print(f"clicks: {stats.clicks} in {elapsed:.2f}s ({stats.clicks / elapsed:.0f}/s)")
+    print(
+        f"click latency p50 {percentile(latencies, 50) * 1000:.1f} ms, "
+        f"p99 {percentile(latencies, 99) * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory puzzle server load test")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--games", type=int, default=1, help="games per session")
+    asyncio.run(main(parser.parse_args()))
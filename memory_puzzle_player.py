@@ -0,0 +1,205 @@
+import argparse
+from collections import namedtuple
+
+import pygame
+from pygame.locals import (
+    K_DOWN,
+    K_END,
+    K_ESCAPE,
+    K_HOME,
+    K_LEFT,
+    K_PAGEDOWN,
+    K_PAGEUP,
+    K_RIGHT,
+    K_SPACE,
+    K_UP,
+    KEYDOWN,
+    QUIT,
+)
+
+import memory_puzzle_settings as settings
+import memory_puzzle_engine as engine
+from memory_puzzle import Camera, Drawable
+from memory_puzzle_replay import ReplayLog, create_board
+
+KEYFRAME_INTERVAL = 256
+MIN_SPEED = 1
+MAX_SPEED = 64
+
+Keyframe = namedtuple("Keyframe", ["moves", "mismatches", "first_tile", "revealed"])
+
+
+class Player:
+    # Plays a replay log forwards and seeks anywhere in it. The game state
+    # is kept every `interval` clicks, so a seek restores the nearest one
+    # and applies at most `interval` clicks instead of starting over. Tile
+    # ids and identities never change, so a keyframe only holds the
+    # counters and the revealed bitset.
+    def __init__(self, replay, interval=KEYFRAME_INTERVAL):
+        self.replay = replay
+        self.interval = interval
+        self.keyframes = []
+        self.layout = create_board(replay, compact=True)
+        game = self.restore(self.keyframe(engine.Engine(self.layout)))
+        for position, click in enumerate(replay.clicks):
+            if position % interval == 0:
+                self.keyframes.append(self.keyframe(game))
+            game.select(replay.indexes(click))
+        if not self.keyframes:
+            self.keyframes.append(self.keyframe(game))
+        self.game = None
+        self.position = 0
+        self.last = None
+        self.seek(0)
+
+    def __len__(self):
+        return len(self.replay.clicks)
+
+    @property
+    def time(self):
+        # Milliseconds into the game of the last applied click.
+        return self.replay.clicks[self.position - 1].time if self.position else 0
+
+    @staticmethod
+    def keyframe(game):
+        return Keyframe(
+            game.moves, game.mismatches, game.first_tile, bytes(game.board.revealed)
+        )
+
+    def restore(self, keyframe):
+        layout = self.layout
+        board = engine.CompactBoard(
+            layout.width,
+            layout.height,
+            layout.ids,
+            layout.identities,
+            bytearray(keyframe.revealed),
+        )
+        game = engine.Engine(board)
+        game.moves = keyframe.moves
+        game.mismatches = keyframe.mismatches
+        game.first_tile = keyframe.first_tile
+        return game
+
+    def step(self):
+        click = self.replay.clicks[self.position]
+        self.last = self.game.select(self.replay.indexes(click))
+        self.position += 1
+
+    def seek(self, position):
+        position = max(0, min(position, len(self)))
+        ahead = position - self.position
+        if self.game is None or not 0 <= ahead < self.interval:
+            # Start one click early when possible, so the selection that
+            # led to `position` is known and a mismatch can be shown.
+            key = max(0, position - 1) // self.interval
+            self.game = self.restore(self.keyframes[key])
+            self.position = key * self.interval
+            self.last = None
+        while self.position < position:
+            self.step()
+
+    def advance(self, until):
+        # Applies every click made up to `until` ms; returns how many.
+        start = self.position
+        clicks = self.replay.clicks
+        while self.position < len(clicks) and clicks[self.position].time <= until:
+            self.step()
+        return self.position - start
+
+    def opened(self):
+        # Tiles face up but not matched: a lone first pick, or the pair of
+        # the last mismatch.
+        if self.game.first_tile is not None:
+            return (self.game.first_tile,)
+        if self.last is not None and self.last.result == engine.MISMATCH:
+            return (self.last.first, self.last.second)
+        return ()
+
+
+def fit_zoom(config):
+    width, height = config.resolution
+    view_width, view_height = config.window_size
+    return min(1.0, view_width / width, view_height / height)
+
+
+def play(replay, speed=1, start=0, config=None):
+    if config is None:
+        config = settings.GameConfig(
+            tiles_on_width=replay.width, tiles_on_height=replay.height
+        )
+    pygame.display.init()
+    pygame.display.set_caption(f"{config.title} replay")
+    window = pygame.display.set_mode(config.window_size)
+    camera = Camera(
+        config.window_size, replay.width, replay.height, fit_zoom(config), config
+    )
+    clock = pygame.time.Clock()
+
+    player = Player(replay)
+    player.seek(start)
+    playhead = player.time
+    playing = True
+    changed = True
+    run = True
+    while run:
+        for event in pygame.event.get():
+            if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
+                run = False
+            elif event.type == KEYDOWN:
+                target = {
+                    K_LEFT: player.position - 1,
+                    K_RIGHT: player.position + 1,
+                    K_PAGEUP: player.position - max(1, len(player) // 10),
+                    K_PAGEDOWN: player.position + max(1, len(player) // 10),
+                    K_HOME: 0,
+                    K_END: len(player),
+                }.get(event.key)
+                if target is not None:
+                    player.seek(target)
+                    playhead = player.time
+                    changed = True
+                elif event.key == K_SPACE:
+                    playing = not playing
+                    changed = True
+                elif event.key == K_UP:
+                    speed = min(speed * 2, MAX_SPEED)
+                    changed = True
+                elif event.key == K_DOWN:
+                    speed = max(speed // 2, MIN_SPEED)
+                    changed = True
+
+        dt = clock.tick(config.fps)
+        if playing and player.position < len(player):
+            playhead += dt * speed
+            # Every click due this frame is applied, but the board is only
+            # drawn once, so high speeds skip the frames in between.
+            changed = player.advance(playhead) > 0 or changed
+
+        if changed:
+            Drawable.draw_board(
+                window, player.game.board, camera, player.opened(), config=config
+            )
+            status = "playing" if playing else "paused"
+            Drawable.draw_overlay(
+                window,
+                f"click {player.position}/{len(player)}  {speed}x  {status}",
+                config,
+            )
+            Drawable.update_display()
+            changed = False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory puzzle replay player")
+    parser.add_argument("replay", help="replay log recorded with --record")
+    parser.add_argument(
+        "--speed",
+        type=int,
+        default=MIN_SPEED,
+        choices=[2**i for i in range(7)],
+        help="playback speed",
+    )
+    parser.add_argument("--seek", type=int, default=0, help="click to start at")
+    args = parser.parse_args()
+    play(ReplayLog.load(args.replay), args.speed, args.seek)
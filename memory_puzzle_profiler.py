@@ -0,0 +1,104 @@
+import csv
+import json
+import time
+from collections import deque
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+def percentile(samples, q):
+    # Nearest-rank percentile of a sequence of values, or of a mapping of
+    # value -> number of occurrences.
+    if isinstance(samples, dict):
+        total = sum(samples.values())
+        rank = min(total - 1, int(q / 100 * total))
+        seen = 0
+        for value in sorted(samples):
+            seen += samples[value]
+            if seen > rank:
+                return value
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        spans = self.profiler.spans
+        spans[self.name] = spans.get(self.name, 0) + time.perf_counter() - self.start
+        return False
+
+
+class Profiler:
+    # Times named phases of each frame. When disabled, span() hands back a
+    # shared no-op context manager and end_frame() returns immediately.
+    # Every frame is only kept for dump() with keep_trace; the overlay
+    # needs just the last `window` frames.
+    def __init__(self, enabled=False, window=120, keep_trace=False):
+        self.enabled = enabled
+        self.keep_trace = keep_trace
+        self.frames = deque(maxlen=window)
+        self.spans = {}
+        self.names = []
+        self.trace = []
+
+    def span(self, name):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def end_frame(self, frame_ms):
+        if not self.enabled:
+            return
+        for name in self.spans:
+            if name not in self.names:
+                self.names.append(name)
+        work_ms = sum(self.spans.values()) * 1000
+        self.frames.append(work_ms)
+        if self.keep_trace:
+            self.trace.append(
+                (frame_ms, work_ms, {n: t * 1000 for n, t in self.spans.items()})
+            )
+        self.spans = {}
+
+    def percentile(self, q):
+        return percentile(self.frames, q) if self.frames else 0.0
+
+    def summary(self):
+        return f"p50 {self.percentile(50):.2f} ms  p99 {self.percentile(99):.2f} ms"
+
+    def rows(self):
+        for frame, (frame_ms, work_ms, spans) in enumerate(self.trace):
+            row = {"frame": frame, "frame_ms": frame_ms, "work_ms": work_ms}
+            for name in self.names:
+                row[name] = spans.get(name, 0.0)
+            yield row
+
+    def dump(self, path):
+        # The file extension picks the format: .csv, anything else is JSON.
+        with open(path, "w", newline="") as trace_file:
+            if path.endswith(".csv"):
+                fields = ["frame", "frame_ms", "work_ms"] + self.names
+                writer = csv.DictWriter(trace_file, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(self.rows())
+            else:
+                json.dump(list(self.rows()), trace_file)
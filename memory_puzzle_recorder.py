@@ -0,0 +1,188 @@
+import os
+import sys
+import zlib
+import struct
+import threading
+from collections import deque, namedtuple
+
+import pygame
+
+# magic, version, encoding, width, height, fps
+HEADER = struct.Struct("<4sBBHHH")
+# milliseconds since the game started, region count
+FRAME = struct.Struct("<IH")
+# left, top, width, height, encoded size
+REGION = struct.Struct("<HHHHI")
+
+MAGIC = b"MPVR"
+VERSION = 1
+RAW, ZLIB = 0, 1
+# zlib releases the GIL while it compresses, so the writer thread does not
+# hold up the game loop.
+ENCODINGS = {"raw": RAW, "zlib": ZLIB}
+ZLIB_LEVEL = 1
+MAX_BYTES = 64 * 1024 * 1024
+WRITER_NICENESS = 10
+
+Frame = namedtuple("Frame", ["time", "regions"])
+Region = namedtuple("Region", ["rect", "pixels"])
+
+
+class RecordingError(ValueError):
+    pass
+
+
+class FrameRing:
+    # Bounded FIFO between the game loop and the writer thread, sized in
+    # bytes. push() never blocks; a frame that does not fit is refused.
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.frames = deque()
+        self.size = 0
+        self.max_bytes = max_bytes
+        self.closed = False
+        self.ready = threading.Condition()
+
+    def push(self, frame, size):
+        with self.ready:
+            if self.size + size > self.max_bytes and self.frames:
+                return False
+            self.frames.append((frame, size))
+            self.size += size
+            self.ready.notify()
+            return True
+
+    def pop(self):
+        # Returns None once the ring is closed and drained.
+        with self.ready:
+            while not self.frames and not self.closed:
+                self.ready.wait()
+            if not self.frames:
+                return None
+            frame, size = self.frames.popleft()
+            self.size -= size
+            return frame
+
+    def close(self):
+        with self.ready:
+            self.closed = True
+            self.ready.notify()
+
+
+class Recorder:
+    # Captures the dirty rects of every frame on the game loop and encodes
+    # and writes them on a background thread. A frame refused by the full
+    # ring is dropped and the next one is captured whole, so the file
+    # never depends on pixels that were not written.
+    def __init__(self, path, size, fps, encoding="zlib", max_bytes=MAX_BYTES):
+        self.encoding = ENCODINGS[encoding]
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.encoding, *size, fps))
+        self.ring = FrameRing(max_bytes)
+        self.keyframe = True
+        self.frames = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self.write_frames, daemon=True)
+        self.thread.start()
+
+    def capture(self, surf, time, rects):
+        # `rects` is what Drawable.update_display() flushed: None when the
+        # whole display changed.
+        bounds = surf.get_rect()
+        if rects is None or self.keyframe:
+            rects = [bounds]
+        regions = []
+        size = 0
+        for rect in rects:
+            rect = bounds.clip(rect)
+            if rect.width and rect.height:
+                pixels = pygame.image.tobytes(surf.subsurface(rect), "RGB")
+                regions.append(Region(tuple(rect), pixels))
+                size += len(pixels)
+        if not regions:
+            return
+        if self.ring.push(Frame(time, regions), size):
+            self.keyframe = False
+            self.frames += 1
+        else:
+            self.keyframe = True
+            self.dropped += 1
+
+    def write_frames(self):
+        # zlib no longer needs the GIL, but still needs a CPU. Linux sets
+        # priorities per thread, so there the writer gives way to the game
+        # loop when both want the same core.
+        if sys.platform == "linux":
+            try:
+                os.setpriority(
+                    os.PRIO_PROCESS, threading.get_native_id(), WRITER_NICENESS
+                )
+            except OSError:
+                pass
+        while True:
+            frame = self.ring.pop()
+            if frame is None:
+                break
+            parts = [FRAME.pack(frame.time, len(frame.regions))]
+            for rect, pixels in frame.regions:
+                if self.encoding == ZLIB:
+                    pixels = zlib.compress(pixels, ZLIB_LEVEL)
+                parts.append(REGION.pack(*rect, len(pixels)))
+                parts.append(pixels)
+            self.file.write(b"".join(parts))
+
+    def close(self):
+        self.ring.close()
+        self.thread.join()
+        self.file.close()
+
+
+def read_frames(path):
+    # Yields (width, height, fps) first, then a Frame per recorded frame
+    # with decoded RGB regions.
+    with open(path, "rb") as video:
+        header = video.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise RecordingError("recording is truncated")
+        magic, version, encoding, width, height, fps = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise RecordingError("not a memory puzzle recording")
+        if version != VERSION:
+            raise RecordingError(f"unsupported recording version {version}")
+        if encoding not in ENCODINGS.values():
+            raise RecordingError(f"unknown pixel encoding {encoding}")
+        yield width, height, fps
+        while True:
+            data = video.read(FRAME.size)
+            if not data:
+                break
+            if len(data) < FRAME.size:
+                raise RecordingError("recording is truncated")
+            time, count = FRAME.unpack(data)
+            regions = []
+            for _ in range(count):
+                data = video.read(REGION.size)
+                if len(data) < REGION.size:
+                    raise RecordingError("recording is truncated")
+                *rect, size = REGION.unpack(data)
+                pixels = video.read(size)
+                if len(pixels) < size:
+                    raise RecordingError("recording is truncated")
+                if encoding == ZLIB:
+                    pixels = zlib.decompress(pixels)
+                regions.append(Region(tuple(rect), pixels))
+            yield Frame(time, regions)
+
+
+if __name__ == "__main__":
+    frames = read_frames(sys.argv[1])
+    width, height, fps = next(frames)
+    count = pixels = 0
+    time = 0
+    for frame in frames:
+        count += 1
+        time = frame.time
+        pixels += sum(rect[2] * rect[3] for rect, _ in frame.regions)
+    print(
+        f"{width}x{height} at {fps} fps, {count} frames over {time / 1000:.1f}s, "
+        f"{pixels / max(count, 1):.0f} pixels per frame"
+    )
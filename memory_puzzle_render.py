@@ -0,0 +1,114 @@
+import os
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+import memory_puzzle_settings as settings
+import memory_puzzle_snapshot as snapshot
+from memory_puzzle import Camera, Core, Drawable
+from memory_puzzle_cli import parse_size
+
+CHUNK = 50
+MODES = ("revealed", "hidden", "snapshot")
+
+
+def render(board, path, opened=(), show_all=False, zoom=1.0, config=None):
+    # Draws a board onto an offscreen surface the size of the whole board.
+    if config is None:
+        config = settings.GameConfig(
+            tiles_on_width=len(board[0]), tiles_on_height=len(board)
+        )
+    camera = None
+    size = config.resolution
+    if zoom != 1.0:
+        camera = Camera(size, len(board[0]), len(board), zoom, config)
+        size = (
+            camera.board_width * camera.pitch + camera.gap_size,
+            camera.board_height * camera.pitch + camera.gap_size,
+        )
+        camera.view_width, camera.view_height = size
+    surf = pygame.Surface(size)
+    surf.fill(config.board_color)
+    Drawable.draw_board(surf, board, camera, opened, show_all, config)
+    Drawable.dirty.flush()
+    pygame.image.save(surf, path)
+
+
+def render_chunk(jobs, mode, width, height, zoom, out_dir):
+    # Runs in a worker process. A job is a board seed, or a snapshot path
+    # in snapshot mode.
+    paths = []
+    for job in jobs:
+        if mode == "snapshot":
+            game = snapshot.restore(job)
+            board = game.board
+            opened = () if game.first_tile is None else (game.first_tile,)
+            name = os.path.splitext(os.path.basename(job))[0]
+            config = None
+        else:
+            config = settings.GameConfig(tiles_on_width=width, tiles_on_height=height)
+            board = Core.create_new_board(rng=random.Random(job), config=config)
+            opened = ()
+            name = f"board-{job}"
+        path = os.path.join(out_dir, f"{name}.png")
+        render(board, path, opened, mode == "revealed", zoom, config)
+        paths.append(path)
+    return paths
+
+
+def render_parallel(jobs, mode, width, height, zoom, out_dir, workers=None):
+    chunks = [jobs[start : start + CHUNK] for start in range(0, len(jobs), CHUNK)]
+    paths = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(
+            render_chunk,
+            chunks,
+            [mode] * len(chunks),
+            [width] * len(chunks),
+            [height] * len(chunks),
+            [zoom] * len(chunks),
+            [out_dir] * len(chunks),
+        ):
+            paths.extend(result)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render memory puzzle boards to PNG")
+    parser.add_argument("snapshots", nargs="*", help="snapshot files (snapshot mode)")
+    parser.add_argument("--mode", choices=MODES, default="revealed")
+    parser.add_argument("--count", type=int, default=100, help="boards to render")
+    parser.add_argument(
+        "--size",
+        type=parse_size,
+        default=(settings.TILES_ON_WIDTH, settings.TILES_ON_HEIGHT),
+        help="board size, e.g. 10x8",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="board i is rendered from seed + i"
+    )
+    parser.add_argument("--zoom", type=float, default=1.0, help="e.g. 0.25 for thumbs")
+    parser.add_argument("--out", default="boards", help="output directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if args.mode == "snapshot":
+        if not args.snapshots:
+            parser.error("snapshot mode needs at least one snapshot file")
+        jobs = args.snapshots
+    else:
+        jobs = list(range(args.seed, args.seed + args.count))
+    os.makedirs(args.out, exist_ok=True)
+
+    start = time.perf_counter()
+    width, height = args.size
+    paths = render_parallel(
+        jobs, args.mode, width, height, args.zoom, args.out, args.workers
+    )
+    elapsed = time.perf_counter() - start
+    print(f"{len(paths)} boards in {elapsed:.2f}s ({len(paths) / elapsed:.0f}/s)")
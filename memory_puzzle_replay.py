@@ -0,0 +1,111 @@
+import random
+import struct
+import sys
+from collections import namedtuple
+
+import memory_puzzle_settings as settings
+import memory_puzzle_engine as engine
+from memory_puzzle_engine import Indexes, new_seed
+
+# magic, version, seed, width, height, milliseconds from the first frame
+# to the end of the preview, click count
+HEADER = struct.Struct("<4sBQHHII")
+# milliseconds since the preview ended, tile index (y * width + x)
+CLICK = struct.Struct("<II")
+
+MAGIC = b"MPRL"
+VERSION = 1
+
+Click = namedtuple("Click", ["time", "index"])
+
+
+class ReplayError(ValueError):
+    pass
+
+
+class ReplayLog:
+    # Records the seed a board was generated from and every click the game
+    # accepted, which is all that is needed to play the game again.
+    def __init__(self, seed, width, height, clicks=None, start=0):
+        if not 0 <= seed < settings.SEED_LIMIT:
+            raise ReplayError(f"seed must be in 0..{settings.SEED_LIMIT - 1}")
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.clicks = [] if clicks is None else clicks
+        # When play started, in ms after the first frame; click times count
+        # from here, so they leave the preview out.
+        self.start = start
+
+    def rng(self):
+        return random.Random(self.seed)
+
+    def record(self, time, indexes):
+        self.clicks.append(Click(time, indexes.y * self.width + indexes.x))
+
+    def indexes(self, click):
+        return Indexes(click.index % self.width, click.index // self.width)
+
+    def to_bytes(self):
+        parts = [
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                self.seed,
+                self.width,
+                self.height,
+                self.start,
+                len(self.clicks),
+            )
+        ]
+        parts.extend(CLICK.pack(*click) for click in self.clicks)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size:
+            raise ReplayError("replay is truncated")
+        magic, version, seed, width, height, start, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError("not a memory puzzle replay")
+        if version != VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        if len(data) != HEADER.size + count * CLICK.size:
+            raise ReplayError("replay is truncated")
+        clicks = [
+            Click(*fields)
+            for fields in CLICK.iter_unpack(memoryview(data)[HEADER.size :])
+        ]
+        return cls(seed, width, height, clicks, start)
+
+    def save(self, path):
+        with open(path, "wb") as replay_file:
+            replay_file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as replay_file:
+            return cls.from_bytes(replay_file.read())
+
+
+def create_board(replay, compact=False):
+    if compact:
+        return engine.create_compact_board(replay.width, replay.height, replay.rng())
+    return engine.create_board(replay.width, replay.height, replay.rng())
+
+
+def simulate(replay, compact=False):
+    game = engine.Engine(create_board(replay, compact))
+    for click in replay.clicks:
+        game.select(replay.indexes(click))
+    return game
+
+
+if __name__ == "__main__":
+    replay = ReplayLog.load(sys.argv[1])
+    game = simulate(replay)
+    print(
+        f"seed {replay.seed}, {replay.width}x{replay.height}, "
+        f"{len(replay.clicks)} clicks, {game.moves} moves, "
+        f"{game.mismatches} mismatches, won: {game.is_won()}"
+    )
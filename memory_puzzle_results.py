@@ -0,0 +1,179 @@
+import time
+import queue
+import sqlite3
+import argparse
+import threading
+from array import array
+from collections import namedtuple
+
+from memory_puzzle_cli import parse_size
+
+QUEUE_SIZE = 1024
+BATCH_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    moves INTEGER NOT NULL,
+    mismatches INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    -- array('I') of milliseconds each move took
+    move_latencies BLOB NOT NULL
+);
+-- Leaderboards are per board size, over all time or a recent window.
+CREATE INDEX IF NOT EXISTS games_by_score
+    ON games (width, height, moves, duration_ms);
+CREATE INDEX IF NOT EXISTS games_by_time
+    ON games (width, height, finished_at);
+"""
+
+INSERT = """
+INSERT INTO games (
+    finished_at, width, height, seed, moves, mismatches, duration_ms,
+    move_latencies
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+LEADERBOARD = """
+SELECT finished_at, width, height, seed, moves, mismatches, duration_ms,
+    move_latencies
+FROM games
+WHERE width = ? AND height = ? AND finished_at >= ?
+ORDER BY moves, duration_ms
+LIMIT ?
+"""
+
+GameResult = namedtuple(
+    "GameResult",
+    [
+        "finished_at",
+        "width",
+        "height",
+        "seed",
+        "moves",
+        "mismatches",
+        "duration_ms",
+        "move_latencies",
+    ],
+)
+
+
+def move_latencies(replay):
+    # Accepted clicks alternate first and second picks, so every second
+    # click ends a move.
+    latencies = array("I")
+    previous = 0
+    for click in replay.clicks[1::2]:
+        latencies.append(click.time - previous)
+        previous = click.time
+    return latencies
+
+
+def game_result(replay, game, finished_at=None):
+    # Click times count from the end of the preview, so neither the duration
+    # nor the first move's latency includes it.
+    return GameResult(
+        time.time() if finished_at is None else finished_at,
+        replay.width,
+        replay.height,
+        replay.seed,
+        game.moves,
+        game.mismatches,
+        replay.clicks[-1].time if replay.clicks else 0,
+        move_latencies(replay),
+    )
+
+
+def connect(path):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # WAL keeps the database consistent without a sync on every commit.
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def to_row(result):
+    return result._replace(move_latencies=result.move_latencies.tobytes())
+
+
+def from_row(row):
+    result = GameResult(*row)
+    return result._replace(move_latencies=array("I", result.move_latencies))
+
+
+class ResultsStore:
+    # record() hands a result to a writer thread through a bounded queue and
+    # never blocks; when the queue is full the result is dropped and
+    # counted. The writer commits whatever has queued up in one batch.
+    def __init__(self, path, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.queue = queue.Queue(queue_size)
+        self.dropped = 0
+        self.reader = connect(path)
+        self.thread = threading.Thread(target=self.write_results, daemon=True)
+        self.thread.start()
+
+    def record(self, result):
+        try:
+            self.queue.put_nowait(to_row(result))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def write_results(self):
+        connection = connect(self.path)
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = batch[: batch.index(None)]
+            with connection:
+                connection.executemany(INSERT, batch)
+        connection.close()
+
+    def close(self):
+        # Waits for everything queued so far to be written.
+        self.queue.put(None)
+        self.thread.join()
+        self.reader.close()
+
+    def leaderboard(self, width, height, since=0.0, limit=10):
+        rows = self.reader.execute(LEADERBOARD, (width, height, since, limit))
+        return [from_row(row) for row in rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory puzzle leaderboard")
+    parser.add_argument("database", help="results database written with --results")
+    parser.add_argument("--size", type=parse_size, default=(4, 5), help="e.g. 4x5")
+    parser.add_argument("--days", type=float, help="only games from the last N days")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    store = ResultsStore(args.database)
+    since = time.time() - args.days * 86400 if args.days else 0.0
+    for rank, result in enumerate(
+        store.leaderboard(*args.size, since, args.limit), start=1
+    ):
+        latencies = result.move_latencies
+        average = sum(latencies) / len(latencies) if latencies else 0
+        print(
+            f"{rank:3}. {result.moves} moves, {result.mismatches} mismatches, "
+            f"{result.duration_ms / 1000:.1f}s ({average:.0f} ms per move), "
+            f"seed {result.seed}, "
+            f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(result.finished_at))}"
+        )
+    store.close()
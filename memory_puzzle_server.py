@@ -0,0 +1,180 @@
+import asyncio
+import argparse
+import random
+import resource
+
+import memory_puzzle_settings as settings
+import memory_puzzle_engine as engine
+from memory_puzzle_engine import Indexes
+from memory_puzzle_replay import new_seed
+
+# Line protocol, one ASCII command per line.
+#
+#   client                      server
+#   NEW [width height [seed]]   HELLO width height seed
+#   CLICK x y                   OPEN x y shape r g b glyph
+#                               then MATCH or MISMATCH on a second tile,
+#                               and WON moves mismatches on the last pair
+#                               IGNORED x y if the click was not accepted
+#   QUIT                        BYE
+#
+# After a MISMATCH the server sends HIDE x1 y1 x2 y2 once the cooldown
+# has run out; clicks before that are IGNORED. A greeting HELLO is sent
+# on connect, and malformed commands get ERROR message.
+
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_TILES = 200 * 200
+
+
+class Session:
+    def __init__(self, writer, width, height, cooldown):
+        self.writer = writer
+        self.cooldown = cooldown
+        self.timer = None
+        self.new_game(width, height, new_seed())
+
+    def new_game(self, width, height, seed):
+        # The board is built first, so a failure leaves the current game and
+        # its cooldown timer untouched.
+        board = engine.create_compact_board(width, height, random.Random(seed))
+        self.cancel_timer()
+        self.width, self.height, self.seed = width, height, seed
+        self.game = engine.Engine(board)
+        # Turn's phases last zero time here: a phase only ends when update()
+        # is called, which the event loop does from a call_later timer.
+        self.turn = engine.Turn(self.game, preview_time=0, cooldown_time=0)
+        self.turn.update(0)
+        self.send(f"HELLO {width} {height} {seed}")
+
+    def send(self, line):
+        self.writer.write(line.encode() + b"\n")
+
+    def cancel_timer(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def end_cooldown(self):
+        self.timer = None
+        self.turn.update(0)
+        first, second = self.turn.pending
+        self.send(f"HIDE {first.x} {first.y} {second.x} {second.y}")
+
+    def click(self, x, y):
+        indexes = Indexes(x, y)
+        selection = self.turn.click(indexes)
+        if selection.result == engine.IGNORED:
+            self.send(f"IGNORED {x} {y}")
+            return
+
+        tile = self.game.tile(indexes)
+        red, green, blue = tile.color
+        self.send(f"OPEN {x} {y} {tile.shape} {red} {green} {blue} {tile.glyph}")
+        if selection.result == engine.MATCH:
+            self.send("MATCH")
+            if self.turn.state == engine.WON:
+                self.send(f"WON {self.game.moves} {self.game.mismatches}")
+        elif selection.result == engine.MISMATCH:
+            self.send("MISMATCH")
+            loop = asyncio.get_running_loop()
+            self.timer = loop.call_later(self.cooldown, self.end_cooldown)
+
+    def handle(self, line):
+        # Returns False once the client has asked to leave.
+        command, *args = line.split()
+        if command == "CLICK" and len(args) == 2:
+            self.click(int(args[0]), int(args[1]))
+        elif command == "NEW" and len(args) in (0, 2, 3):
+            width, height = (
+                (int(args[0]), int(args[1])) if args else (self.width, self.height)
+            )
+            if not (0 < width and 0 < height and width * height <= MAX_TILES):
+                raise ValueError("board size out of range")
+            if (width * height) % 2:
+                raise ValueError("board needs an even number of tiles")
+            seed = int(args[2]) if len(args) == 3 else new_seed()
+            if not 0 <= seed < settings.SEED_LIMIT:
+                raise ValueError("seed out of range")
+            self.new_game(width, height, seed)
+        elif command == "QUIT":
+            self.send("BYE")
+            return False
+        else:
+            raise ValueError(f"bad command {line!r}")
+        return True
+
+
+class Server:
+    def __init__(self, width, height, cooldown):
+        self.width = width
+        self.height = height
+        self.cooldown = cooldown
+        self.sessions = 0
+        self.peak = 0
+
+    async def serve_client(self, reader, writer):
+        self.sessions += 1
+        self.peak = max(self.peak, self.sessions)
+        session = Session(writer, self.width, self.height, self.cooldown)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    if not session.handle(line.decode().strip()):
+                        break
+                except ValueError as error:
+                    session.send(f"ERROR {error}")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            session.cancel_timer()
+            self.sessions -= 1
+            writer.close()
+
+    async def report(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            print(f"sessions: {self.sessions} (peak {self.peak})", flush=True)
+
+
+def raise_file_limit():
+    # Every session holds a socket, so allow as many as the hard limit does.
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def main(args):
+    raise_file_limit()
+    server = Server(args.width, args.height, args.cooldown / 1000)
+    listener = await asyncio.start_server(
+        server.serve_client, args.host, args.port, backlog=args.backlog
+    )
+    if args.stats:
+        asyncio.ensure_future(server.report(args.stats))
+    print(f"listening on {args.host}:{args.port}", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory puzzle game server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--width", type=int, default=settings.TILES_ON_WIDTH)
+    parser.add_argument("--height", type=int, default=settings.TILES_ON_HEIGHT)
+    parser.add_argument(
+        "--cooldown", type=int, default=settings.MISMATCH_TIME, help="milliseconds"
+    )
+    parser.add_argument("--backlog", type=int, default=4096)
+    parser.add_argument(
+        "--stats", type=float, default=0, help="print session counts every N seconds"
+    )
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
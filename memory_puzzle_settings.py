@@ -1,3 +1,5 @@
+from dataclasses import dataclass, field
+
 TITLE = "Memory puzzle"
 FPS = 30
 
@@ -10,6 +12,7 @@ WINDOW_WIDTH = (BOX_SIZE+GAP_SIZE) * TILES_ON_WIDTH + GAP_SIZE
 WINDOW_HEIGHT = (BOX_SIZE+GAP_SIZE) * TILES_ON_HEIGHT + GAP_SIZE
 
 RESOLUTION = (WINDOW_WIDTH, WINDOW_HEIGHT)
+MAX_RESOLUTION = (1280, 800)
 
 X_MARGIN = GAP_SIZE
 Y_MARGIN = GAP_SIZE
@@ -17,7 +20,21 @@ Y_MARGIN = GAP_SIZE
 
 REVEAL_SPEED = 8
 
+PREVIEW_TIME = 10000
+MISMATCH_TIME = 2000
+
+# Board seeds are kept in replay logs and in the results database, whose
+# INTEGER column is a signed 64-bit int.
+SEED_LIMIT = 1 << 63
+
 BOXES_OPEN_SPEED = 8
+
+SCROLL_SPEED = 20
+ZOOM_STEP = 1.25
+MIN_ZOOM = 0.1
+MAX_ZOOM = 4
+
+OVERLAY_FONT_SIZE = 18
 GRAY = (100, 100, 100)
 NAVYBLUE = (60, 60, 100)
 WHITE = (255, 255, 255)
@@ -34,6 +51,7 @@ BG_COLOR = NAVYBLUE
 LIGHT_BG_COLOR = GRAY
 BOX_COLOR = WHITE
 HIGHLIGHT_COLOR = BLUE
+OVERLAY_COLOR = WHITE
 BOARD_COLOR = GRAY
 
 DONUT = "donut"
@@ -41,6 +59,70 @@ SQUARE = "square"
 DIAMOND = "diamond"
 LINES = "lines"
 OVAL = "oval"
+TRIANGLE = "triangle"
+CROSS = "cross"
 
 ALL_COLORS = (RED, GREEN, BLUE, YELLOW, ORANGE, PURPLE, CYAN)
 ALL_SHAPES = (DONUT, SQUARE, DIAMOND, LINES, OVAL)
+
+EXTRA_SHAPES = (TRIANGLE, CROSS)
+EXTRA_COLORS = 9
+GLYPH_BITS = 9
+GLYPH_COLOR = BG_COLOR
+
+
+@dataclass(frozen=True, slots=True)
+class GameConfig:
+    title: str = TITLE
+    fps: int = FPS
+    box_size: int = BOX_SIZE
+    gap_size: int = GAP_SIZE
+    tiles_on_width: int = TILES_ON_WIDTH
+    tiles_on_height: int = TILES_ON_HEIGHT
+    max_resolution: tuple = MAX_RESOLUTION
+    reveal_speed: int = REVEAL_SPEED
+    preview_time: int = PREVIEW_TIME
+    mismatch_time: int = MISMATCH_TIME
+    scroll_speed: int = SCROLL_SPEED
+    zoom_step: float = ZOOM_STEP
+    min_zoom: float = MIN_ZOOM
+    max_zoom: float = MAX_ZOOM
+    overlay_font_size: int = OVERLAY_FONT_SIZE
+    bg_color: tuple = BG_COLOR
+    box_color: tuple = BOX_COLOR
+    board_color: tuple = BOARD_COLOR
+    highlight_color: tuple = HIGHLIGHT_COLOR
+    overlay_color: tuple = OVERLAY_COLOR
+    glyph_color: tuple = GLYPH_COLOR
+
+    # Derived once in __post_init__.
+    pitch: int = field(init=False)
+    x_margin: int = field(init=False)
+    y_margin: int = field(init=False)
+    resolution: tuple = field(init=False)
+    window_size: tuple = field(init=False)
+    style: tuple = field(init=False)
+
+    def __post_init__(self):
+        pitch = self.box_size + self.gap_size
+        resolution = (
+            pitch * self.tiles_on_width + self.gap_size,
+            pitch * self.tiles_on_height + self.gap_size,
+        )
+        derived = {
+            "pitch": pitch,
+            "x_margin": self.gap_size,
+            "y_margin": self.gap_size,
+            "resolution": resolution,
+            "window_size": (
+                min(resolution[0], self.max_resolution[0]),
+                min(resolution[1], self.max_resolution[1]),
+            ),
+            # Everything besides the icon itself that shows up in a sprite.
+            "style": (self.board_color, self.bg_color, self.glyph_color),
+        }
+        for name, value in derived.items():
+            object.__setattr__(self, name, value)
+
+
+DEFAULT_CONFIG = GameConfig()
@@ -0,0 +1,165 @@
+import sys
+import struct
+import weakref
+from array import array
+from itertools import chain
+from operator import attrgetter
+
+import memory_puzzle_settings as settings
+import memory_puzzle_engine as engine
+from memory_puzzle_engine import Indexes
+
+# magic, version, width, height, identity count, moves, mismatches,
+# first tile index (or -1)
+HEADER = struct.Struct("<4sBxHHIIIi")
+# shape, red, green, blue, glyph
+IDENTITY = struct.Struct("<BBBBH")
+
+MAGIC = b"MPSN"
+VERSION = 1
+SHAPES = settings.ALL_SHAPES + settings.EXTRA_SHAPES
+SHAPE_CODES = {shape: code for code, shape in enumerate(SHAPES)}
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class PackedIdentities:
+    # The identity table of a loaded snapshot, left packed and decoded one
+    # entry at a time as tiles are looked at.
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data) // IDENTITY.size
+
+    def __getitem__(self, code):
+        if not 0 <= code < len(self):
+            raise IndexError(code)
+        shape, red, green, blue, glyph = IDENTITY.unpack_from(
+            self.data, code * IDENTITY.size
+        )
+        return SHAPES[shape], (red, green, blue), glyph
+
+
+# Identities and tile ids never change once a board is built, so each
+# game's packed identity table and ids are kept here, as (board, identity
+# count, bytes), and only the header and revealed flags change per dump.
+layouts = weakref.WeakKeyDictionary()
+REVEALED_BITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def pack_layout(board):
+    if isinstance(board, engine.CompactBoard):
+        identities = board.identities
+        ids = array("H", board.ids)
+    else:
+        codes = {}
+        ids = array("H")
+        for row in board:
+            for tile in row:
+                key = (tile.shape, tile.color, tile.glyph)
+                ids.append(codes.setdefault(key, len(codes)))
+        identities = list(codes)
+    if isinstance(identities, PackedIdentities):
+        table = bytes(identities.data)
+    else:
+        table = b"".join(
+            IDENTITY.pack(SHAPE_CODES[shape], *color, glyph)
+            for shape, color, glyph in identities
+        )
+    if sys.byteorder == "big":
+        ids.byteswap()
+    return len(identities), table + ids.tobytes()
+
+
+def pack_revealed(board):
+    if isinstance(board, engine.CompactBoard):
+        return bytes(board.revealed)
+    # One 0/1 byte per tile, read as a binary number with the first tile
+    # as the lowest bit, gives the same bitset a CompactBoard keeps.
+    flags = bytes(map(attrgetter("revealed"), chain.from_iterable(board)))
+    bits = flags[::-1].translate(REVEALED_BITS)
+    return int(bits, 2).to_bytes((len(flags) + 7) // 8, "little")
+
+
+def dump(game):
+    board = game.board
+    cached = layouts.get(game)
+    if cached is None or cached[0] is not board:
+        cached = (board, *pack_layout(board))
+        layouts[game] = cached
+    _, count, layout = cached
+    width, height = game.width, game.height
+    first = game.first_tile
+    first = -1 if first is None else first.y * width + first.x
+    return b"".join(
+        (
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                width,
+                height,
+                count,
+                game.moves,
+                game.mismatches,
+                first,
+            ),
+            layout,
+            pack_revealed(board),
+        )
+    )
+
+
+def load(data):
+    # The identity table and tile ids stay views into `data`, and
+    # identities are only decoded when a tile is looked at. The revealed
+    # bitset is a view as well when `data` is writable, otherwise it is
+    # copied.
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise SnapshotError("snapshot is truncated")
+    magic, version, width, height, count, moves, mismatches, first = (
+        HEADER.unpack_from(view)
+    )
+    if magic != MAGIC:
+        raise SnapshotError("not a memory puzzle snapshot")
+    if version != VERSION:
+        raise SnapshotError(f"unsupported snapshot version {version}")
+
+    tiles = width * height
+    ids_start = HEADER.size + count * IDENTITY.size
+    revealed_start = ids_start + tiles * 2
+    if len(view) != revealed_start + (tiles + 7) // 8:
+        raise SnapshotError("snapshot is truncated")
+
+    identities = PackedIdentities(view[HEADER.size : ids_start])
+    ids = view[ids_start:revealed_start].cast("H")
+    if sys.byteorder == "big":
+        ids = array("H", ids)
+        ids.byteswap()
+    revealed = view[revealed_start:]
+    if revealed.readonly:
+        revealed = bytearray(revealed)
+
+    board = engine.CompactBoard(width, height, ids, identities, revealed)
+    game = engine.Engine(board)
+    game.moves = moves
+    game.mismatches = mismatches
+    if first >= 0:
+        game.first_tile = Indexes(first % width, first // width)
+    layouts[game] = (board, count, view[HEADER.size : revealed_start])
+    return game
+
+
+def save(game, path):
+    with open(path, "wb") as snapshot_file:
+        snapshot_file.write(dump(game))
+
+
+def restore(path):
+    with open(path, "rb") as snapshot_file:
+        return load(bytearray(snapshot_file.read()))
@@ -0,0 +1,222 @@
+import os
+import time
+import random
+import argparse
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import memory_puzzle_engine as engine
+from memory_puzzle_engine import Indexes
+from memory_puzzle_cli import parse_size
+from memory_puzzle_profiler import percentile
+
+CHUNK = 2000
+MAX_MOVES = 1_000_000
+
+
+def identity(tile):
+    # The same fields Tile.__eq__ compares, in a hashable form.
+    return tile.shape, tile.color, tile.glyph
+
+
+class Pool:
+    # Set of positions with O(1) add, remove and random choice.
+    def __init__(self, items=()):
+        self.items = list(items)
+        self.where = {item: i for i, item in enumerate(self.items)}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.where
+
+    def add(self, item):
+        self.where[item] = len(self.items)
+        self.items.append(item)
+
+    def remove(self, item):
+        i = self.where.pop(item)
+        last = self.items.pop()
+        if i < len(self.items):
+            self.items[i] = last
+            self.where[last] = i
+
+    def choice(self, rng):
+        return self.items[rng.randrange(len(self.items))]
+
+
+class Solver:
+    # Remembers up to `capacity` face-down tiles it has seen, forgetting the
+    # least recently seen first. None means unlimited (perfect memory) and
+    # 0 means no memory at all (random play).
+    def __init__(self, game, capacity=None, rng=random):
+        self.game = game
+        self.capacity = capacity
+        self.rng = rng
+        self.unknown = Pool(
+            Indexes(x, y)
+            for y in range(game.height)
+            for x in range(game.width)
+            if not game.tile(Indexes(x, y)).revealed
+        )
+        self.memory = OrderedDict()
+        self.by_identity = {}
+        self.pairs = []
+
+    def remember(self, indexes, key):
+        if self.capacity == 0:
+            return
+        if indexes in self.memory:
+            self.memory.move_to_end(indexes)
+            return
+        self.unknown.remove(indexes)
+        self.memory[indexes] = key
+        seen = self.by_identity.setdefault(key, [])
+        seen.append(indexes)
+        if len(seen) == 2:
+            self.pairs.append(key)
+        if self.capacity is not None and len(self.memory) > self.capacity:
+            oldest = next(iter(self.memory))
+            self.forget(oldest)
+            self.unknown.add(oldest)
+
+    def forget(self, indexes):
+        key = self.memory.pop(indexes)
+        seen = self.by_identity[key]
+        seen.remove(indexes)
+        if not seen:
+            del self.by_identity[key]
+        elif key in self.pairs:
+            self.pairs.remove(key)
+
+    def discard(self, indexes):
+        # Drops a matched tile from whatever the solver knows about it.
+        if indexes in self.memory:
+            self.forget(indexes)
+        elif indexes in self.unknown:
+            self.unknown.remove(indexes)
+
+    def pick_unknown(self, exclude=None):
+        if exclude is not None and exclude in self.unknown:
+            self.unknown.remove(exclude)
+            try:
+                return self.pick_unknown()
+            finally:
+                self.unknown.add(exclude)
+        if self.unknown:
+            return self.unknown.choice(self.rng)
+        candidates = [i for i in self.memory if i != exclude]
+        return candidates[self.rng.randrange(len(candidates))]
+
+    def move(self):
+        if self.pairs:
+            first, second = self.by_identity[self.pairs[-1]]
+        else:
+            first = self.pick_unknown()
+            key = identity(self.game.tile(first))
+            known = [i for i in self.by_identity.get(key, ()) if i != first]
+            second = known[0] if known else self.pick_unknown(exclude=first)
+
+        self.game.select(first)
+        selection = self.game.select(second)
+        if selection.result == engine.MATCH:
+            self.discard(first)
+            self.discard(second)
+        else:
+            self.remember(first, identity(self.game.tile(first)))
+            self.remember(second, identity(self.game.tile(second)))
+        return selection
+
+    def solve(self, max_moves=MAX_MOVES):
+        while not self.game.is_won():
+            if self.game.moves >= max_moves:
+                raise RuntimeError(f"no solution within {max_moves} moves")
+            self.move()
+        return self.game.moves
+
+
+def parse_strategy(name):
+    # "random", "perfect" or "bounded:K" to the solver's memory capacity.
+    if name == "random":
+        return 0
+    if name == "perfect":
+        return None
+    if name.startswith("bounded:"):
+        return int(name.split(":", 1)[1])
+    raise ValueError(f"unknown strategy {name!r}")
+
+
+def play_games(strategy, width, height, games, seed):
+    if (width * height) % 2:
+        raise ValueError("solvers need a board with an even number of tiles")
+    capacity = parse_strategy(strategy)
+    rng = random.Random(seed)
+    moves = Counter()
+    for _ in range(games):
+        game = engine.Engine(engine.create_board(width, height, rng))
+        moves[Solver(game, capacity, rng).solve()] += 1
+    return moves
+
+
+def play_parallel(strategy, width, height, games, workers=None, seed=0, chunk=CHUNK):
+    # Splits the games into chunks with their own seeds, so the result only
+    # depends on `seed` and `chunk`, not on the number of workers.
+    sizes = [min(chunk, games - start) for start in range(0, games, chunk)]
+    seeds = [f"{seed}:{i}" for i in range(len(sizes))]
+    moves = Counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(
+            play_games,
+            [strategy] * len(sizes),
+            [width] * len(sizes),
+            [height] * len(sizes),
+            sizes,
+            seeds,
+        ):
+            moves.update(result)
+    return moves
+
+
+def describe(moves):
+    games = sum(moves.values())
+    ordered = sorted(moves)
+    return {
+        "games": games,
+        "mean": sum(value * count for value, count in moves.items()) / games,
+        "min": ordered[0],
+        "p50": percentile(moves, 50),
+        "p90": percentile(moves, 90),
+        "p99": percentile(moves, 99),
+        "max": ordered[-1],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory puzzle solvers")
+    parser.add_argument(
+        "--strategy",
+        action="append",
+        help="random, perfect or bounded:K (default: all three with K=8)",
+    )
+    parser.add_argument(
+        "--size", type=parse_size, action="append", help="board size, e.g. 4x5"
+    )
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for width, height in args.size or [(4, 5)]:
+        for strategy in args.strategy or ["random", "bounded:8", "perfect"]:
+            start = time.perf_counter()
+            moves = play_parallel(
+                strategy, width, height, args.games, args.workers, args.seed
+            )
+            stats = describe(moves)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{width}x{height} {strategy:>10}: "
+                + " ".join(f"{k}={v:.1f}" for k, v in stats.items() if k != "games")
+                + f"  ({stats['games'] / elapsed:.0f} games/sec)"
+            )